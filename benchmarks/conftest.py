@@ -0,0 +1,38 @@
+import os
+import sys
+import tracemalloc
+import pytest
+
+
+# Gives the benchmarks access to the package and to the fake driver of the test suite
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Record counts, which are benchmarked. Larger results need a few GB of memory, so the largest ones can be left out
+# by setting CYPHER_KERNEL_BENCH_MAX_RECORDS, e.g., to 10000 for a quick run.
+SIZES = [10**2, 10**4, 10**6]
+MAX_RECORDS = int(os.environ.get("CYPHER_KERNEL_BENCH_MAX_RECORDS", 10**6))
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        metafunc.parametrize("size", [size for size in SIZES if size <= MAX_RECORDS])
+
+
+@pytest.fixture
+def measure(benchmark):
+    """Benchmark `func` after `setup` and record the peak memory of one extra traced run in the extra info.
+
+    Large inputs are expensive to build, so every round gets a fresh input from `setup` and runs once.
+    """
+
+    def run(func, setup=lambda: (), rounds=3):
+        benchmark.pedantic(lambda args: func(*args), setup=lambda: ((setup(),), {}), rounds=rounds, iterations=1)
+        args = setup()
+        tracemalloc.start()
+        try:
+            func(*args)
+            benchmark.extra_info["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return run
@@ -0,0 +1,68 @@
+import pytest
+from tests.fake_neo4j import FakeConnection, fake_kernel, synthetic_records
+
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def kernel(monkeypatch, tmp_path):
+    conn = FakeConnection(
+        schema={
+            "labels": [f"Label{k}" for k in range(1000)],
+            "relationship_types": [f"TYPE{k}" for k in range(1000)],
+            "property_keys": [f"p{k}" for k in range(1000)],
+            "procedures": [f"db.procedure{k}" for k in range(1000)],
+        }
+    )
+    # No caps and no graph budget, so that every record goes through the hot paths
+    config = "max_rows: null\nmax_bytes: null\ngraph_max_nodes: null\ngraph_max_edges: null\n"
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config=config, keep=False)
+    return kernel
+
+
+def _graph(kernel, size):
+    nodes, relations, _ = kernel._process_response(synthetic_records(size))
+    return nodes, relations
+
+
+def test_process_response(kernel, measure, size):
+    measure(kernel._process_response, setup=lambda: (list(synthetic_records(size)),))
+
+
+def test_process_response_scalars(kernel, measure, size):
+    measure(kernel._process_response, setup=lambda: (list(synthetic_records(size, shape="scalar")),))
+
+
+def test_response_to_js_graph(kernel, measure, size):
+    nodes, relations = _graph(kernel, size)
+    kernel._color_nodes(nodes)
+    measure(kernel._response_to_js_graph, setup=lambda: (nodes, relations, "element"))
+
+
+def test_color_nodes(kernel, measure, size):
+    nodes, _ = _graph(kernel, size)
+
+    def setup():
+        kernel.global_node_colors.clear()
+        return (nodes,)
+
+    measure(kernel._color_nodes, setup=setup)
+
+
+def test_do_complete(kernel, measure):
+    kernel._schema._refreshing.acquire()
+    kernel._schema._refresh()
+    code = "MATCH (n:Label1)-[r:TYPE1]->(m) WHERE n.p1 = 1 RETURN n.p"
+    measure(kernel.do_complete, setup=lambda: (code, len(code)), rounds=100)
+
+
+@pytest.mark.parametrize("shape", ["scalar", "triple"])
+def test_do_execute(kernel, measure, size, shape):
+    kernel.conn.results = lambda query, parameters: synthetic_records(size, shape=shape)
+
+    def execute(code):
+        assert kernel.do_execute(code, False)["status"] == "ok"
+        assert kernel.last_result_stats["rows"] == size
+
+    measure(execute, setup=lambda: ("MATCH (n)-[r]->(m) RETURN n, r, m",), rounds=1 if size >= 10**6 else 3)
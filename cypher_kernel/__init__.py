@@ -1,3 +1,10 @@
 __version__ = "0.3.2"
 
-from .kernel import CypherKernel
+
+def __getattr__(name):
+    # The kernel and its dependencies are only imported when needed, e.g., not by `python -m cypher_kernel.install`
+    if name == "CypherKernel":
+        from .kernel import CypherKernel
+
+        return CypherKernel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
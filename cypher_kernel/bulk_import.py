@@ -0,0 +1,215 @@
+import os
+import csv
+import json
+import time
+import zlib
+import shlex
+import random
+import argparse
+import concurrent.futures
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+from .metrics import SUMMARY_COUNTERS
+from .cypher_text import mask_literals
+
+
+# File formats by extension, `--format` overrides the detection
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+# Errors after which a batch is written again, anything else aborts the import
+RETRYABLE_ERRORS = (TransientError, ServiceUnavailable, SessionExpired)
+
+
+class ImportArgumentParser(argparse.ArgumentParser):
+    def error(self, message):
+        # The kernel must not exit on a typo in a magic line
+        raise ValueError(f"%%import: {message}")
+
+
+def parse_import_args(magic_args, batch_size=1000, writers=1, retries=3):
+    """Parse the arguments of an `%%import` magic line, defaults come from the configuration."""
+    parser = ImportArgumentParser(prog="%%import", add_help=False)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())))
+    parser.add_argument("--batch-size", type=int, default=batch_size)
+    parser.add_argument("--writers", type=int, default=writers)
+    parser.add_argument("--partition", help="Column, whose values assign rows to writers, e.g., a label column")
+    parser.add_argument("--retries", type=int, default=retries)
+    parser.add_argument("--delimiter", default=",")
+    args = parser.parse_args(shlex.split(magic_args))
+    if args.batch_size < 1 or args.writers < 1 or args.retries < 0:
+        raise ValueError("%%import: --batch-size and --writers must be positive, --retries must not be negative")
+    if args.format is None:
+        extension = os.path.splitext(args.path)[1].lower()
+        if extension not in FORMATS:
+            raise ValueError(f"%%import: cannot tell the format of {args.path}, use --format")
+        args.format = FORMATS[extension]
+    return args
+
+
+def import_query(code):
+    """The Cypher of an `%%import` cell, which gets an `UNWIND $rows AS row` prefix unless it uses `$rows` itself."""
+    code = code.strip().rstrip(";")
+    if not code:
+        raise ValueError("%%import: the cell needs a query below the magic line, which writes each `row`")
+    if "$rows" not in mask_literals(code):
+        code = "UNWIND $rows AS row\n" + code
+    return code
+
+
+def _csv_chunks(path, batch_size, delimiter):
+    with open(path, newline="", encoding="utf-8") as fp:
+        chunk = []
+        for row in csv.DictReader(fp, delimiter=delimiter):
+            # Like `LOAD CSV`, values are strings and empty fields are null
+            chunk.append({key: value if value != "" else None for key, value in row.items()})
+            if len(chunk) >= batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _jsonl_chunks(path, batch_size):
+    with open(path, encoding="utf-8") as fp:
+        chunk = []
+        for line in fp:
+            if line.strip():
+                chunk.append(json.loads(line))
+            if len(chunk) >= batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _parquet_chunks(path, batch_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("%%import: reading Parquet files requires pyarrow") from None
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield record_batch.to_pylist()
+
+
+def read_chunks(path, format, batch_size, delimiter=","):
+    """Yield the rows of a file as lists of at most `batch_size` dictionaries, without reading the whole file."""
+    if format == "csv":
+        return _csv_chunks(path, batch_size, delimiter)
+    if format == "jsonl":
+        return _jsonl_chunks(path, batch_size)
+    if format == "parquet":
+        return _parquet_chunks(path, batch_size)
+    raise ValueError(f"%%import: unknown format {format}")
+
+
+class BulkImporter:
+    """Write chunks of rows with a parameterized query in batches, one transaction per batch.
+
+    Every writer is a worker thread with its own pooled session. With a `partition` column, rows with the same value
+    always go to the same writer, so that writers of label-partitioned data do not compete for the same locks.
+    Otherwise batches are spread round-robin. At most two batches per writer are in flight, so memory stays bounded
+    no matter how large the file is. Batches failing with transient errors are retried with exponential backoff.
+    """
+
+    def __init__(self, conn, query, batch_size=1000, writers=1, partition=None, retries=3, tag=None, parameters=None):
+        self.conn = conn
+        self.query = query
+        # Further parameters of the query besides `$rows`
+        self.parameters = parameters or {}
+        self.batch_size = batch_size
+        self.writers = writers
+        self.partition = partition
+        self.retries = retries
+        self.tag = tag
+        self.rows = 0
+        self.batches = 0
+        self.retried = 0
+        self.counters = {}
+        self.started = None
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started if self.started else 0.0
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed else 0.0
+
+    def _write(self, rows):
+        for attempt in range(self.retries + 1):
+            try:
+                summary = self.conn.summarize(self.query, {**self.parameters, "rows": rows}, tag=self.tag)
+                return len(rows), summary, attempt
+            except RETRYABLE_ERRORS:
+                if attempt == self.retries:
+                    raise
+                time.sleep(min(0.1 * 2**attempt, 5.0) * random.uniform(0.5, 1.5))
+
+    def _batches(self, chunks):
+        """Yield (writer, rows) pairs, regrouping rows per writer when the data is partitioned."""
+        if self.partition is None:
+            for number, chunk in enumerate(chunks):
+                yield number % self.writers, chunk
+            return
+        buffers = [[] for _ in range(self.writers)]
+        for chunk in chunks:
+            for row in chunk:
+                writer = zlib.crc32(str(row.get(self.partition)).encode()) % self.writers
+                buffers[writer].append(row)
+                if len(buffers[writer]) >= self.batch_size:
+                    yield writer, buffers[writer]
+                    buffers[writer] = []
+        for writer, rows in enumerate(buffers):
+            if rows:
+                yield writer, rows
+
+    def _collect(self, done):
+        for future in done:
+            rows, summary, attempts = future.result()
+            self.rows += rows
+            self.batches += 1
+            self.retried += attempts
+            for name in SUMMARY_COUNTERS:
+                value = getattr(summary.counters, name, 0) if summary is not None else 0
+                if value:
+                    self.counters[name] = self.counters.get(name, 0) + value
+
+    def run(self, chunks, progress=None, interval=0.5):
+        """Import all chunks, `progress` is called with the importer at most every `interval` seconds."""
+        self.started = time.perf_counter()
+        # One thread per writer keeps the batches of a partition in order
+        executors = [concurrent.futures.ThreadPoolExecutor(max_workers=1) for _ in range(self.writers)]
+        pending = set()
+        last_progress = self.started
+
+        def wait(max_pending):
+            nonlocal pending, last_progress
+            while len(pending) > max_pending:
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=0.1, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                self._collect(done)
+                if progress is not None and time.perf_counter() - last_progress >= interval:
+                    last_progress = time.perf_counter()
+                    progress(self)
+
+        try:
+            for writer, rows in self._batches(chunks):
+                wait(2 * self.writers - 1)
+                pending.add(executors[writer].submit(self._write, rows))
+            wait(0)
+        finally:
+            for future in pending:
+                future.cancel()
+            for executor in executors:
+                executor.shutdown(wait=False)
+        return self
+
+    def report(self):
+        text = f"Imported {self.rows:,} rows in {self.batches:,} batches in {self.elapsed:.1f} s"
+        text += f" ({self.rows_per_second:,.0f} rows/s)"
+        if self.retried:
+            text += f", {self.retried} retried batches"
+        if self.counters:
+            text += "\n" + ", ".join(f"{name}: {value:,}" for name, value in self.counters.items())
+        return text
@@ -0,0 +1,156 @@
+import os
+
+
+# Accepted types and default value per configuration key
+CONFIG_SCHEMA = {
+    "user": ((str,), "neo4j"),
+    "pwd": ((str,), "pwd"),
+    "host": ((str,), "neo4j://localhost:7687"),
+    "connect_result_nodes": ((bool,), False),
+    "cmd_timeout": ((int, float, type(None)), None),
+    "helper_max_bytes": ((int, type(None)), 10 * 1024 * 1024),
+    "fetch_size": ((int,), 1000),
+    "max_rows": ((int, type(None)), 1000),
+    "max_bytes": ((int, type(None)), 10 * 1024 * 1024),
+    "max_connection_pool_size": ((int,), 100),
+    "connection_timeout": ((int, float), 30.0),
+    "max_connection_lifetime": ((int, float), 3600),
+    "liveness_check_timeout": ((int, float, type(None)), 60.0),
+    "query_timeout": ((int, float, type(None)), None),
+    "multi_statement_mode": ((str,), "transaction"),
+    "parallel_max_concurrency": ((int,), 4),
+    "import_batch_size": ((int,), 1000),
+    "import_writers": ((int,), 1),
+    "import_retries": ((int,), 3),
+    "cache_enabled": ((bool,), False),
+    "cache_max_entries": ((int,), 128),
+    "cache_max_bytes": ((int,), 64 * 1024 * 1024),
+    "prewarm_helpers": ((bool,), False),
+    "python_mode": ((str,), "helper"),
+    "python_adjacency": ((bool,), False),
+    "graph_js_dump_path": ((str, type(None)), None),
+    "table_max_rows": ((int, type(None)), 100),
+    "table_max_width": ((int, type(None)), 60),
+    "graph_max_nodes": ((int, type(None)), 1000),
+    "graph_max_edges": ((int, type(None)), 5000),
+    "graph_reduction": ((str,), "sample"),
+    "graph_layout": ((str,), "browser"),
+    "graph_layout_iterations": ((int,), 30),
+    "schema_ttl": ((int, float, type(None)), 300.0),
+    "metrics_footer": ((bool,), False),
+    "metrics_file": ((str, type(None)), None),
+    "metrics_format": ((str,), "jsonl"),
+    "workload_file": ((str, type(None)), None),
+}
+# Allowed values of keys, which select between a fixed set of strategies
+CONFIG_CHOICES = {
+    "multi_statement_mode": ("transaction", "autocommit"),
+    "python_mode": ("helper", "kernel"),
+    "graph_reduction": ("sample", "summary"),
+    "graph_layout": ("browser", "kernel"),
+    "metrics_format": ("jsonl", "prometheus"),
+}
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def config_path():
+    """
+    Path of the YAML configuration in the default Jupyter configuration directory.
+    http://jupyter.readthedocs.io/en/latest/projects/jupyter-directories.html#configuration-files
+    """
+    config_dir = os.environ.get("JUPYTER_CONFIG_DIR")
+    if not config_dir:
+        config_dir = ".jupyter"
+    return os.path.join(os.path.expanduser("~"), config_dir, "cypher_config.yml")
+
+
+class CypherConfig:
+    """Typed and validated configuration, values are accessible as attributes and by key.
+
+    Keys missing in the configuration file fall back to their defaults, keys that are not part of the schema are
+    collected in `unknown_keys` instead of being silently ignored. `error` holds the problem of a file, which could
+    not be used, when these are the defaults in its place.
+    """
+
+    def __init__(self, values=None):
+        values = values or {}
+        if not isinstance(values, dict):
+            raise ConfigError(f"Configuration must be a mapping, got {type(values).__name__}")
+        for key, (types, default) in CONFIG_SCHEMA.items():
+            value = values.get(key, default)
+            # bool is an int, so `True` must not pass as a row cap
+            if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+                names = ", ".join("null" if t is type(None) else t.__name__ for t in types)
+                raise ConfigError(f"Configuration key '{key}' must be of type {names}, got {value!r}")
+            if key in CONFIG_CHOICES and value not in CONFIG_CHOICES[key]:
+                choices = ", ".join(CONFIG_CHOICES[key])
+                raise ConfigError(f"Configuration key '{key}' must be one of {choices}, got {value!r}")
+            setattr(self, key, value)
+        self.unknown_keys = sorted(k for k in values if k not in CONFIG_SCHEMA)
+        self.error = None
+
+    def __getitem__(self, key):
+        if key not in CONFIG_SCHEMA:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in CONFIG_SCHEMA}
+
+    @classmethod
+    def from_file(cls, path):
+        import yaml
+
+        try:
+            with open(path) as fp:
+                values = yaml.load(fp, Loader=yaml.FullLoader)
+        except FileNotFoundError:
+            # Using default configuration
+            values = None
+        except yaml.YAMLError as e:
+            raise ConfigError(f"Cannot parse {path}: {e}")
+        return cls(values)
+
+
+class ConfigLoader:
+    """Loads the configuration once and reloads it only when the modification time of the file changes."""
+
+    def __init__(self, path=None, log=None):
+        self.path = path or config_path()
+        self.log = log
+        self._mtime = None
+        self._config = None
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def get(self):
+        mtime = self._current_mtime()
+        if self._config is not None and mtime == self._mtime:
+            return self._config
+        try:
+            config = CypherConfig.from_file(self.path)
+        except ConfigError as e:
+            self._mtime = mtime
+            if self._config is None:
+                # A broken file must not keep the kernel from starting, the defaults are used until it is fixed
+                if self.log is not None:
+                    self.log.error("%s, using the default configuration", e)
+                self._config = CypherConfig()
+                self._config.error = str(e)
+                return self._config
+            # Keep working with the last valid configuration while the file is edited
+            if self.log is not None:
+                self.log.error("%s, keeping previous configuration", e)
+            return self._config
+        if config.unknown_keys and self.log is not None:
+            self.log.warning("Unknown keys in %s: %s", self.path, ", ".join(config.unknown_keys))
+        self._mtime = mtime
+        self._config = config
+        return config
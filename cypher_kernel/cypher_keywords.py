@@ -49,14 +49,11 @@ KEYWORDS = [
     "STARTS",
     "XOR",
     "CONSTRAINT",
-    "CREATE",
     "DROP",
-    "EXISTS",
     "INDEX",
     "NODE",
     "KEY",
     "UNIQUE",
-    "INDEX",
     "JOIN",
     "PERIODIC",
     "COMMIT",
@@ -0,0 +1,28 @@
+import re
+
+
+# String literals, quoted identifiers and comments, which must not be mistaken for keywords or be normalized
+_LITERALS = re.compile(r"'(?:\\.|[^'\\])*'|\"(?:\\.|[^\"\\])*\"|`[^`]*`|//[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def mask_literals(query, keep_length=False):
+    """Replace string literals and comments with blanks, so that only the query structure remains.
+
+    With `keep_length`, every masked character becomes a blank, so that positions in the result match the query.
+    """
+    if keep_length:
+        return _LITERALS.sub(lambda match: " " * len(match.group(0)), query)
+    return _LITERALS.sub(" ", query)
+
+
+def normalize_query(query):
+    """Collapse whitespace outside of string literals and drop comments and trailing semicolons."""
+    parts, pos = [], 0
+    for match in _LITERALS.finditer(query):
+        parts.append(" ".join(query[pos : match.start()].split()))
+        literal = match.group(0)
+        if not literal.startswith(("//", "/*")):
+            parts.append(literal)
+        pos = match.end()
+    parts.append(" ".join(query[pos:].split()))
+    return " ".join(p for p in parts if p).rstrip("; ")
@@ -0,0 +1,84 @@
+from collections import Counter
+from .graph_render import first_label
+
+
+class SummaryNode:
+    """A node of a label-level summary graph, shaped like a driver node as far as the renderer is concerned."""
+
+    def __init__(self, id, label, count):
+        self.id = id
+        self.labels = frozenset([label])
+        self._properties = {"count": count}
+        # The ids are made up per summary, so its positions in the layout cache must not collide with real nodes
+        self.layout_key = ("summary", label)
+
+
+class SummaryRelationship:
+    def __init__(self, id, start, end, type, count):
+        self.id = id
+        self.nodes = (start, end)
+        self.type = f"{type} ({count})"
+        self._properties = {"count": count}
+
+
+def over_budget(nodes, relations, max_nodes, max_edges):
+    return (max_nodes is not None and len(nodes) > max_nodes) or (max_edges is not None and len(relations) > max_edges)
+
+
+def sample_graph(nodes, relations, max_nodes, max_edges):
+    """Keep the `max_nodes` nodes of highest degree and at most `max_edges` of the relationships between them."""
+    degrees = Counter()
+    for r in relations:
+        degrees[r.nodes[0].id] += 1
+        degrees[r.nodes[1].id] += 1
+    kept_nodes = sorted(nodes, key=lambda n: degrees[n.id], reverse=True)
+    if max_nodes is not None:
+        kept_nodes = kept_nodes[:max_nodes]
+    kept_ids = {n.id for n in kept_nodes}
+    kept_relations = [r for r in relations if r.nodes[0].id in kept_ids and r.nodes[1].id in kept_ids]
+    if max_edges is not None and len(kept_relations) > max_edges:
+        kept_relations.sort(key=lambda r: degrees[r.nodes[0].id] + degrees[r.nodes[1].id], reverse=True)
+        kept_relations = kept_relations[:max_edges]
+    return set(kept_nodes), set(kept_relations)
+
+
+def summarize_graph(nodes, relations):
+    """Collapse a graph into one node per label and one relationship per type between two labels, with counts."""
+    node_labels = {n.id: first_label(n.labels) for n in nodes}
+
+    def label_of(node):
+        return node_labels.get(node.id, first_label(node.labels))
+
+    label_counts = Counter(node_labels.values())
+    type_counts = Counter((label_of(r.nodes[0]), r.type, label_of(r.nodes[1])) for r in relations)
+    for start, _, end in type_counts:
+        label_counts.setdefault(start, 0)
+        label_counts.setdefault(end, 0)
+
+    summary_nodes = {label: SummaryNode(idx, label, count) for idx, (label, count) in enumerate(label_counts.items())}
+    summary_relations = [
+        SummaryRelationship(idx, summary_nodes[start], summary_nodes[end], type, count)
+        for idx, ((start, type, end), count) in enumerate(type_counts.items())
+    ]
+    return set(summary_nodes.values()), set(summary_relations)
+
+
+def reduce_graph(nodes, relations, max_nodes, max_edges, mode="sample"):
+    """Reduce a graph that exceeds the budget for visualization.
+
+    Returns the nodes and relationships to render and a note describing the reduction, which is `None` when the
+    graph fits into the budget.
+    """
+    if not over_budget(nodes, relations, max_nodes, max_edges):
+        return nodes, relations, None
+    total = f"{len(nodes)} nodes and {len(relations)} relationships"
+    if mode == "summary":
+        summary_nodes, summary_relations = summarize_graph(nodes, relations)
+        note = f"The result has {total}, showing a summary of {len(summary_nodes)} labels and their relationships."
+        return summary_nodes, summary_relations, note
+    kept_nodes, kept_relations = sample_graph(nodes, relations, max_nodes, max_edges)
+    note = (
+        f"The result has {total}, showing the {len(kept_nodes)} nodes of highest degree "
+        f"and {len(kept_relations)} relationships between them."
+    )
+    return kept_nodes, kept_relations, note
@@ -0,0 +1,188 @@
+import os
+import html
+import json
+import functools
+from string import Template
+
+
+# vis-network is shipped with the package and installed as kernel spec resources, see `install.py`
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+VIS_JS = "vis-network.min.js"
+VIS_CSS = "vis-network.css"
+# Relative to the base URL of the notebook server, which serves the resources of installed kernel specs
+VIS_JS_PATH = f"kernelspecs/cypher/{VIS_JS}"
+VIS_CSS_PATH = f"kernelspecs/cypher/{VIS_CSS}"
+# Target of the comm, over which the kernel sends changes of an accumulated graph, see `graph_diff_payload`
+GRAPH_COMM_TARGET = "cypher_kernel.graph"
+
+# Compiled once on import. The graph is injected as a single JSON document of compact arrays, which the browser
+# expands into vis.js items, instead of rendering one JavaScript literal per node and relationship.
+GRAPH_JS = Template(
+    """(function() {
+  function draw(vis) {
+    var graph = $graph;
+
+    function toNode(n) {
+      // vis-network shows string titles as plain text, so the title is passed as an element
+      var title = document.createElement('div');
+      title.innerHTML = n[2];
+      var node = {id: n[0], label: n[1], title: title, color: graph.colors[n[1]]};
+      if (n.length > 3) {
+        // Positions computed by the kernel
+        node.x = n[3];
+        node.y = n[4];
+      }
+      return node;
+    }
+
+    function toEdge(e) {
+      return {from: e[0], to: e[1], arrows: 'to', title: e[2], id: e[3]};
+    }
+
+    var nodes = new vis.DataSet(graph.nodes.map(toNode));
+
+    // create an array with edges
+    var edges = new vis.DataSet(graph.edges.map(toEdge));
+
+    // create a network
+    var container = document.getElementById('$element_id');
+    var data = {
+      nodes: nodes,
+      edges: edges
+    };
+
+    var options = {
+      edges: {
+        arrows: {
+          to: {
+            scaleFactor: 0.5
+          }
+        }
+      },
+      width: '100%',
+      height: '500px',
+      interaction: {hover: true},
+      physics: graph.physics
+    };
+
+    var network = new vis.Network(container, data, options);
+
+    var kernel = window.Jupyter && Jupyter.notebook && Jupyter.notebook.kernel;
+    if ($live && kernel && kernel.comm_manager) {
+      // Later results arrive as changes to this graph instead of as a new graph
+      var comm = kernel.comm_manager.new_comm('$comm_target', {});
+      comm.on_msg(function(msg) {
+        var diff = msg.content.data;
+        Object.assign(graph.colors, diff.colors);
+        edges.remove(diff.removed_edges);
+        nodes.remove(diff.removed_nodes);
+        nodes.update(diff.nodes.map(toNode));
+        edges.update(diff.edges.map(toEdge));
+      });
+    }
+  }
+
+  if (window.vis && window.vis.Network) {
+    draw(window.vis);
+  } else {
+    // The page was reloaded since the kernel injected the library, load it from the kernel spec resources instead
+    var base = (window.Jupyter && Jupyter.notebook && Jupyter.notebook.base_url)
+      || document.body.getAttribute('data-base-url') || '/';
+    var css = document.createElement('link');
+    css.rel = 'stylesheet';
+    css.href = base + '$vis_css_path';
+    document.head.appendChild(css);
+    require([base + '$vis_js_path'], draw);
+  }
+})();
+"""
+)
+
+# Defines `window.vis` once per notebook session. The UMD wrapper of vis-network must not see the notebook's AMD
+# loader, otherwise it registers an anonymous module instead of the global.
+VIS_LIBRARY_JS = Template(
+    """(function(define, exports, module) {
+$vis_js
+})();
+(function() {
+  var style = document.createElement('style');
+  style.textContent = $vis_css;
+  document.head.appendChild(style);
+})();
+"""
+)
+
+GRAPH_HTML = Template(
+    """<div id="$element_id"></div>
+"""
+)
+
+
+@functools.lru_cache(maxsize=1)
+def vis_library_js():
+    with open(os.path.join(RESOURCES_DIR, VIS_JS)) as fp:
+        # Drop the source map reference, the map is not shipped
+        vis_js = fp.read().replace("//# sourceMappingURL=vis-network.min.js.map", "")
+    with open(os.path.join(RESOURCES_DIR, VIS_CSS)) as fp:
+        vis_css = json.dumps(fp.read())
+    return VIS_LIBRARY_JS.substitute(vis_js=vis_js, vis_css=vis_css)
+
+
+def first_label(labels):
+    """The label by which a node is named and colored, nodes without labels get an empty one."""
+    return next(iter(labels), "")
+
+
+def properties_title(properties):
+    """Hover title of a node as HTML, property values are escaped."""
+    return "{" + ",<br>".join(f"{html.escape(str(k))}:{html.escape(str(v))}" for k, v in properties.items()) + "}"
+
+
+def _node_list(nodes, positions):
+    node_list = [[n.id, first_label(n.labels), properties_title(n._properties)] for n in nodes]
+    if positions is not None:
+        for node in node_list:
+            node.extend(round(c, 1) for c in positions[node[0]])
+    return node_list
+
+
+def _colors(node_list, node_colors):
+    labels = {n[1] for n in node_list}
+    return {label: f"rgba({node_colors[label]})" for label in labels if label in node_colors}
+
+
+def graph_payload(nodes, relations, node_colors, positions=None):
+    """The graph as compact arrays. With `positions`, nodes carry fixed coordinates and physics is turned off."""
+    node_list = _node_list(nodes, positions)
+    edge_list = [[r.nodes[0].id, r.nodes[1].id, r.type, r.id] for r in relations]
+    colors = _colors(node_list, node_colors)
+    return {"nodes": node_list, "edges": edge_list, "colors": colors, "physics": positions is None}
+
+
+def graph_diff_payload(diff, node_colors, positions=None):
+    """A `GraphDiff` in the shape of `graph_payload`, plus the ids of the removed nodes and relationships."""
+    node_list = _node_list(diff.nodes, positions)
+    return {
+        "nodes": node_list,
+        "edges": [[r.nodes[0].id, r.nodes[1].id, r.type, r.id] for r in diff.relationships],
+        "colors": _colors(node_list, node_colors),
+        "removed_nodes": diff.removed_nodes,
+        "removed_edges": diff.removed_relationships,
+    }
+
+
+def render_graph_js(nodes, relations, element_id, node_colors, positions=None, live=False):
+    """With `live`, the graph opens a comm to the kernel in the classic notebook and applies the diffs it receives."""
+    graph = json.dumps(graph_payload(nodes, relations, node_colors, positions), separators=(",", ":"))
+    return GRAPH_JS.substitute(
+        graph=graph,
+        element_id=element_id,
+        vis_js_path=VIS_JS_PATH,
+        vis_css_path=VIS_CSS_PATH,
+        live=json.dumps(live),
+        comm_target=GRAPH_COMM_TARGET,
+    )
+
+
+def render_graph_html(element_id):
+    return GRAPH_HTML.substitute(element_id=element_id)
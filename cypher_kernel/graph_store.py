@@ -0,0 +1,84 @@
+from collections import OrderedDict
+
+
+# Relationships between new nodes of a result and the nodes known from earlier results, incl. the new ones
+CONNECT_QUERY = "MATCH (a) WHERE id(a) IN $new MATCH (a)-[r]-(b) WHERE id(b) IN $known RETURN DISTINCT r"
+
+
+class GraphDiff:
+    """Nodes and relationships added to or updated in a `GraphStore`, and the ids of the removed ones."""
+
+    def __init__(self, nodes=(), relationships=(), removed_nodes=(), removed_relationships=()):
+        self.nodes = list(nodes)
+        self.relationships = list(relationships)
+        self.removed_nodes = list(removed_nodes)
+        self.removed_relationships = list(removed_relationships)
+
+    def __bool__(self):
+        return bool(self.nodes or self.relationships or self.removed_nodes or self.removed_relationships)
+
+    def describe(self):
+        text = f"Graph updated: +{len(self.nodes)} nodes, +{len(self.relationships)} relationships"
+        if self.removed_nodes or self.removed_relationships:
+            text += f", -{len(self.removed_nodes)} nodes, -{len(self.removed_relationships)} relationships"
+        return text
+
+
+class GraphStore:
+    """The nodes and relationships of several results, keyed by their ids, so that each is stored only once.
+
+    Elements are kept in the order in which results last returned them. Beyond the budgets, the elements that were
+    not returned for the longest time are evicted, and relationships of evicted nodes go with them.
+    """
+
+    def __init__(self):
+        self.nodes = OrderedDict()
+        self.relationships = OrderedDict()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @staticmethod
+    def _changed(old, new):
+        return old is None or old.labels != new.labels or old._properties != new._properties
+
+    def add(self, nodes, relations, max_nodes=None, max_edges=None):
+        """Add the elements of a result and return what changed."""
+        diff = GraphDiff()
+        new_nodes = {n.id for n in nodes if n.id not in self.nodes}
+        new_relationships = {r.id for r in relations if r.id not in self.relationships}
+        for node in nodes:
+            if self._changed(self.nodes.get(node.id), node):
+                diff.nodes.append(node)
+            self.nodes[node.id] = node
+            self.nodes.move_to_end(node.id)
+        for relation in relations:
+            if relation.id not in self.relationships:
+                diff.relationships.append(relation)
+            self.relationships[relation.id] = relation
+            self.relationships.move_to_end(relation.id)
+
+        removed_nodes = set()
+        while max_nodes is not None and len(self.nodes) > max_nodes:
+            removed_nodes.add(self.nodes.popitem(last=False)[0])
+        removed_relationships = set()
+        if removed_nodes:
+            for rel_id, relation in list(self.relationships.items()):
+                if relation.nodes[0].id in removed_nodes or relation.nodes[1].id in removed_nodes:
+                    del self.relationships[rel_id]
+                    removed_relationships.add(rel_id)
+        while max_edges is not None and len(self.relationships) > max_edges:
+            removed_relationships.add(self.relationships.popitem(last=False)[0])
+
+        # Elements, which were added and evicted at once, never reach the frontend
+        diff.nodes = [n for n in diff.nodes if n.id not in removed_nodes]
+        diff.relationships = [r for r in diff.relationships if r.id not in removed_relationships]
+        diff.removed_nodes = sorted(removed_nodes - new_nodes)
+        diff.removed_relationships = sorted(removed_relationships - new_relationships)
+        return diff
+
+    def clear(self):
+        diff = GraphDiff(removed_nodes=list(self.nodes), removed_relationships=list(self.relationships))
+        self.nodes.clear()
+        self.relationships.clear()
+        return diff
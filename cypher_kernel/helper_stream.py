@@ -0,0 +1,140 @@
+import time
+
+
+class HelperInterrupted(Exception):
+    """A command in a helper REPL was interrupted, `alive` tells whether the helper is still usable."""
+
+    def __init__(self, message, alive):
+        super().__init__(message)
+        self.alive = alive
+
+
+class BoundedOutput:
+    """Forwards the output of a command in chunks of at most `flush_interval` seconds, up to `max_bytes` bytes."""
+
+    def __init__(self, write, max_bytes=None, flush_interval=0.1):
+        self.write = write
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.sent = 0
+        self.discarded = 0
+        self._pending = []
+        self._last_flush = time.perf_counter()
+
+    def add(self, text):
+        if not text:
+            return
+        data = text.encode("utf-8", "replace")
+        if self.max_bytes is not None and self.sent + len(data) > self.max_bytes:
+            # Output beyond the limit is read and dropped, so that the helper never blocks on a full pty
+            kept = data[: max(self.max_bytes - self.sent, 0)]
+            self.discarded += len(data) - len(kept)
+            data, text = kept, kept.decode("utf-8", "ignore")
+        self.sent += len(data)
+        if text:
+            self._pending.append(text)
+        if time.perf_counter() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.perf_counter()
+        if self._pending:
+            text, self._pending = "".join(self._pending), []
+            self.write(text)
+
+
+def _starts_prompt(text, prompts):
+    return any(prompt.startswith(text) for prompt in prompts)
+
+
+def _read_until_prompt(repl, output, deadline):
+    """Forward the output of the helper until it shows a prompt and return the index of that prompt.
+
+    At most a tail of the length of a prompt is held back, so memory stays bounded whatever the command prints.
+    """
+    import pexpect
+
+    child = repl.child
+    prompts = [repl.prompt, repl.continuation_prompt]
+    holdback = max(len(prompt) for prompt in prompts) - 1
+    # Output, which pexpect read past an earlier prompt
+    text, child.buffer = child.buffer, child.string_type()
+    while True:
+        found = [(text.find(prompt), index) for index, prompt in enumerate(prompts) if prompt in text]
+        if found:
+            position, index = min(found)
+            output.add(text[:position].replace("\r\n", "\n"))
+            child.buffer = text[position + len(prompts[index]) :]
+            output.flush()
+            return index
+        # Only a tail, which may be the start of a prompt, waits for more output
+        keep = next((k for k in range(min(holdback, len(text)), 0, -1) if _starts_prompt(text[-k:], prompts)), 0)
+        cut = len(text) - keep
+        if cut > 0 and text[cut - 1] == "\r":
+            # Line ends of the pty are "\r\n", which must not be split between two chunks
+            cut -= 1
+        if cut > 0:
+            output.add(text[:cut].replace("\r\n", "\n"))
+            text = text[cut:]
+        if deadline is not None and time.perf_counter() > deadline:
+            raise TimeoutError
+        try:
+            text += child.read_nonblocking(65536, timeout=0.1)
+        except pexpect.TIMEOUT:
+            output.flush()
+
+
+def _interrupt(repl, output, grace):
+    """Send SIGINT to the foreground process of the helper and wait for its prompt, kill it if it does not return."""
+    import pexpect
+
+    repl.child.sendintr()
+    try:
+        _read_until_prompt(repl, output, time.perf_counter() + grace)
+        return True
+    except (TimeoutError, pexpect.EOF):
+        repl.child.terminate(force=True)
+        return False
+
+
+def stream_command(repl, command, write, timeout=None, max_bytes=None, grace=5):
+    """Run a command in a `pexpect.replwrap.REPLWrapper` and pass its output to `write` while it runs.
+
+    Unlike `REPLWrapper.run_command`, the output is not collected. Output beyond `max_bytes` is dropped and the number
+    of dropped bytes is returned. When the command runs longer than `timeout` seconds or the kernel is interrupted,
+    the command gets SIGINT and `HelperInterrupted` is raised. A helper that does not come back within `grace` seconds
+    is killed.
+    """
+    # Like the helpers themselves, pexpect is only imported with the first `%%bash` or `%%python` cell
+    import pexpect
+
+    lines = command.splitlines()
+    if command.endswith("\n"):
+        lines.append("")
+    if not lines:
+        return 0
+    output = BoundedOutput(write, max_bytes)
+    deadline = time.perf_counter() + timeout if timeout is not None else None
+    try:
+        repl.child.sendline(lines[0])
+        for line in lines[1:]:
+            _read_until_prompt(repl, output, deadline)
+            repl.child.sendline(line)
+        prompt = _read_until_prompt(repl, output, deadline)
+        if prompt == 1:
+            # An empty line ends a trailing block, e.g., a `for` loop in Python, like in an interactive session
+            repl.child.sendline("")
+            prompt = _read_until_prompt(repl, output, deadline)
+        if prompt == 1:
+            _interrupt(repl, output, grace)
+            raise ValueError("The input is incomplete, e.g., a block misses its end.")
+    except TimeoutError:
+        alive = _interrupt(repl, output, grace)
+        raise HelperInterrupted(f"The command timed out after {timeout} s and was interrupted.", alive) from None
+    except KeyboardInterrupt:
+        alive = _interrupt(repl, output, grace)
+        raise HelperInterrupted("The command was interrupted.", alive) from None
+    except pexpect.EOF:
+        output.flush()
+        raise HelperInterrupted("The helper process exited.", False) from None
+    return output.discarded
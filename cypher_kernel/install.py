@@ -2,9 +2,11 @@ import argparse
 import json
 import os
 import sys
+import shutil
 
 from jupyter_client.kernelspec import KernelSpecManager
 from IPython.utils.tempdir import TemporaryDirectory
+from .graph_render import RESOURCES_DIR, VIS_CSS, VIS_JS
 
 kernel_json = {
     "argv": [sys.executable, "-m", "cypher_kernel", "-f", "{connection_file}"],
@@ -17,7 +19,9 @@ def install_my_kernel_spec(user=True, prefix=None):
         os.chmod(td, 0o755) # Starts off as 700, not user readable
         with open(os.path.join(td, 'kernel.json'), 'w') as f:
             json.dump(kernel_json, f, sort_keys=True)
-        # TODO: Copy any resources
+        # The notebook server serves these under kernelspecs/cypher/, so graphs render without a CDN
+        for resource in (VIS_JS, VIS_CSS):
+            shutil.copy(os.path.join(RESOURCES_DIR, resource), td)
 
         print('Installing Jupyter kernel spec')
         KernelSpecManager().install_kernel_spec(td, 'cypher', user=user, replace=True, prefix=prefix)
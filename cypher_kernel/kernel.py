@@ -1,17 +1,53 @@
-import os
 import sys
+import time
+
+# Reference point for the startup time, which is logged once the kernel is ready
+_IMPORT_STARTED = time.perf_counter()
+
+import os
 import json
-import yaml
 import uuid
+import tempfile
+import concurrent.futures
 import random
 import platform
-from jinja2 import Template
+import threading
 from neo4j.data import Node, Relationship
-from neo4j.exceptions import Neo4jError
+from neo4j import READ_ACCESS
+from neo4j.exceptions import DriverError, Neo4jError
 from ipykernel.kernelbase import Kernel
+from .bulk_import import BulkImporter, import_query, parse_import_args, read_chunks
+from .config import ConfigLoader
 from .cypher_keywords import KEYWORDS
+from .graph_reduce import reduce_graph
+from .graph_render import GRAPH_COMM_TARGET, first_label, graph_diff_payload, render_graph_html, render_graph_js
+from .graph_render import vis_library_js
+from .graph_store import CONNECT_QUERY, GraphStore
+from .helper_stream import HelperInterrupted, stream_command
+from .layout import LayoutCache, layout_available
+from .metrics import CellMetrics, MetricsExporter
 from .neo4j_connection import Neo4jConnection
-from pexpect.replwrap import bash, python
+from .parameters import ParameterStore, parameter_names, parse_parameters
+from .python_env import HELPER_SETUP, ResultColumns, read_handoff, result_payload, write_handoff
+from .query_plan import plan_rows, render_plan_html, render_plan_text, structured_plan
+from .schema import PrefixIndex, SchemaCache, complete
+from .statements import needs_autocommit, split_statements
+from .table import ResultTable
+from .result_cache import ResultCache, is_cacheable, is_write_query
+from .workload import append_entry, workload_entry
+
+# Failing queries, incl. a database, which is still unavailable after reconnecting, see `Neo4jConnection.stream`
+QUERY_ERRORS = (Neo4jError, DriverError)
+
+
+def _text_size(text):
+    # Encoding is only needed for non-ASCII text, where characters take up to four bytes
+    return len(text) if text.isascii() else len(text.encode("utf-8", "replace"))
+
+
+def _error_message(e):
+    # Driver errors have no `message` of the server
+    return getattr(e, "message", None) or str(e)
 
 
 class CypherKernel(Kernel):
@@ -31,149 +67,232 @@ class CypherKernel(Kernel):
 
     global_node_colors = {}
 
-    my_python = python(command="python")
-    my_python.run_command(
-        """import ast
-import pandas as pd
-import networkx as nx
-G = nx.Graph()
-df = pd.DataFrame()"""
-    )
-
-    if platform.system() == "Windows":
-        # TODO: what shall I do on Windows here???
-        # my_shell = ...
-        pass
-    else:
-        my_shell = bash(command="bash")
+    # Seconds, which the kernel took from importing this module until it was ready, see `start`
+    startup_time = None
+
+    @property
+    def my_python(self):
+        """The REPL for `%%python` cells, which is spawned on first use or by `_prewarm_helpers`."""
+        with self._helpers_lock:
+            if self._my_python is None:
+                from pexpect.replwrap import python
+
+                my_python = python(command="python")
+                # A single line, so that the REPL does not need blank lines to terminate the definitions in the setup
+                my_python.run_command(f"exec({HELPER_SETUP!r})")
+                self._my_python = my_python
+        return self._my_python
+
+    @property
+    def my_shell(self):
+        """The REPL for `%%bash` cells, which is spawned on first use or by `_prewarm_helpers`."""
+        with self._helpers_lock:
+            if self._my_shell is None:
+                from pexpect.replwrap import bash
+
+                my_shell = bash(command="bash")
+                # Bracketed paste mode of newer bash versions would wrap every output in escape sequences
+                my_shell.run_command("bind 'set enable-bracketed-paste off' 2>/dev/null")
+                self._my_shell = my_shell
+        return self._my_shell
+
+    @property
+    def python_namespace(self):
+        """The globals of `%%python` cells with `python_mode: 'kernel'`, which are created on first use."""
+        with self._helpers_lock:
+            if self._python_namespace is None:
+                from .python_namespace import PythonNamespace
+
+                self._python_namespace = PythonNamespace()
+        return self._python_namespace
 
     @property
     def cfg(self):
-        cfg = CypherKernel._parse_config()
+        cfg = self._config_loader.get()
         return cfg
 
     @property
     def user(self):
-        return self.cfg["user"]
+        return self.cfg.user
 
     @property
     def pwd(self):
-        return self.cfg["pwd"]
+        return self.cfg.pwd
 
     @property
     def host(self):
-        return self.cfg["host"]
+        return self.cfg.host
 
     @property
     def connect_result_nodes(self):
-        return self.cfg["connect_result_nodes"]
+        return self.cfg.connect_result_nodes
 
     @property
     def cmd_timeout(self):
-        return self.cfg["cmd_timeout"]
+        return self.cfg.cmd_timeout
+
+    @property
+    def fetch_size(self):
+        return self.cfg.fetch_size
+
+    @property
+    def max_rows(self):
+        return self.cfg.max_rows
+
+    @property
+    def max_bytes(self):
+        return self.cfg.max_bytes
+
+    @property
+    def query_timeout(self):
+        return self.cfg.query_timeout
+
+    @property
+    def multi_statement_mode(self):
+        return self.cfg.multi_statement_mode
+
+    # Seconds to wait for the worker thread to give up a query after its transaction was terminated
+    cancel_timeout = 5
+    # Seconds after which the table of a result, which is still being fetched, is shown and then refreshed
+    table_refresh_interval = 0.5
 
     def __init__(self, **kwargs):
         Kernel.__init__(self, **kwargs)
+        # Metrics of the currently or most recently executed cell
+        self._metrics = CellMetrics(0, None)
+        self._metrics_exporter = None
+        # The Cypher of the current cell, when it ran against the database and is captured with `workload_file`
+        self._workload_query = None
+        # Helper processes for `%%python` and `%%bash` cells are only spawned when needed
+        self._helpers_lock = threading.Lock()
+        self._my_python = None
+        self._my_shell = None
+        self._python_namespace = None
+        # The configuration file is parsed once and only reparsed after it changed
+        self._config_loader = ConfigLoader(log=self.log)
+        self._reported_cfg = None
         # establish connection to DB
-        self.conn = Neo4jConnection(uri=self.host, user=self.user, pwd=self.pwd)
+        self.conn = Neo4jConnection(
+            uri=self.host,
+            user=self.user,
+            pwd=self.pwd,
+            max_connection_pool_size=self.cfg.max_connection_pool_size,
+            connection_timeout=self.cfg.connection_timeout,
+            max_connection_lifetime=self.cfg.max_connection_lifetime,
+            liveness_check_timeout=self.cfg.liveness_check_timeout,
+        )
+        # Queries are consumed on a worker thread, so that the kernel stays responsive to interrupts
+        self._query_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        # A partially consumed result, which can be continued with a `%%more` cell
+        self._pending_result = None
+        self._pending_tag = None
+        self.last_result_stats = {"rows": 0, "size": 0}
+        # Latest result, which was not yet handed over to the `%%python` helper
+        self._python_env_result = None
+        self._python_env_plan = None
+        self._layout_cache = LayoutCache()
+        # Completion of keywords, schema elements, and parameter names, which were used in earlier cells
+        self._keyword_index = PrefixIndex(self.keywords)
+        self._schema = SchemaCache(self.conn, ttl=self.cfg.schema_ttl, log=self.log)
+        self._seen_parameters = set()
+        # Values of `%%params` cells, which are passed to every query using them
+        self._parameters = ParameterStore()
+        self._vis_injected = False
+        # Results accumulate in one graph with `connect_result_nodes`, which is updated over a comm when possible
+        self._graph_store = GraphStore()
+        self._graph_comm = None
+        self._register_comms()
+        self._result_cache = ResultCache(self.cfg.cache_max_entries, self.cfg.cache_max_bytes)
+
+    def start(self):
+        super().start()
+        CypherKernel.startup_time = time.perf_counter() - _IMPORT_STARTED
+        self.log.info("Cypher kernel ready after %.3f s", self.startup_time)
+        self._schema.maybe_refresh()
+        if self.cfg.prewarm_helpers:
+            threading.Thread(target=self._prewarm_helpers, daemon=True).start()
+
+    def _register_comms(self):
+        from ipykernel.comm import CommManager
+
+        self.comm_manager = CommManager(parent=self, kernel=self)
+        self.comm_manager.register_target(GRAPH_COMM_TARGET, self._open_graph_comm)
+        for msg_type in ("comm_open", "comm_msg", "comm_close"):
+            self.shell_handlers[msg_type] = getattr(self.comm_manager, msg_type)
+
+    def _open_graph_comm(self, comm, msg):
+        """Opened by the latest fully rendered accumulated graph, later results are sent to it as diffs."""
+        previous, self._graph_comm = self._graph_comm, comm
+
+        def closed(msg):
+            if self._graph_comm is comm:
+                self._graph_comm = None
+
+        comm.on_close(closed)
+        if previous is not None:
+            previous.close()
 
     @staticmethod
-    def _parse_config():
-        """
-        Parses spawn YAML command options from the default Jupyter configuration directory.
-        http://jupyter.readthedocs.io/en/latest/projects/jupyter-directories.html#configuration-files
-        """
-        config_dir = os.environ.get("JUPYTER_CONFIG_DIR")
-        if not config_dir:
-            config_dir = ".jupyter"
-        config_path = os.path.join(os.path.expanduser("~"), config_dir, "cypher_config.yml")
-        default_config = {
-            "user": "neo4j",
-            "pwd": "pwd",
-            "host": "neo4j://localhost:7687",
-            "connect_result_nodes": False,
-            "cmd_timeout": None,
-        }
+    def _helpers_supported():
+        # The helpers are driven through a pseudo terminal, which pexpect does not provide on Windows
+        return platform.system() != "Windows"
+
+    def _unsupported_helper_response(self, magic, silent):
+        response = f"%%{magic} cells are not supported on {platform.system()}, their helper process needs a terminal."
+        if magic == "python":
+            response += " With `python_mode: 'kernel'`, they run in the kernel process instead."
+        return self._construct_and_send_text_response(response, silent, status="error")
+
+    def _prewarm_helpers(self):
+        """Spawn the helper processes in the background, so that the first magic cell does not wait for them."""
         try:
-            config = yaml.load(open(config_path), Loader=yaml.FullLoader)
-            if len([k for k in default_config.keys() if k in config.keys()]) == 5:
-                return config
-        except FileNotFoundError:
-            # Using default configuration
-            return default_config
-        return default_config
-
-    def _response_to_js_graph(self, nodes, relations, element_id):
-        template_str = """require(["https://cdnjs.cloudflare.com/ajax/libs/vis/4.21.0/vis.min.js"], function(vis) {
-  var nodes = new vis.DataSet([
-    {% for n in nodes %}{ id: {{ n.id }}, label: "{{ label_picker(n.labels) }}", title: "{{ properties_serializer(n._properties) }}", color: 'rgba({{ node_colors[label_picker(n.labels)] }})'},
-    {% endfor %}
-  ]);
-
-  // create an array with edges
-  var edges = new vis.DataSet([
-    {% for r in rels %}{ from: {{ r.nodes[0].id }},to: {{ r.nodes[1].id }}, arrows:'to', title: "{{ r.type }}" },
-    {% endfor %}
-  ]);
-
-  // create a network
-  var container = document.getElementById('{{element_id}}');
-  var data = {
-    nodes: nodes,
-    edges: edges
-  };
-
-  var options = {
-    edges: {
-      arrows: {
-        to: {
-          scaleFactor: 0.5
-        }
-      }
-    },
-    width: '100%',
-    height: '500px',
-    interaction: {hover: true}
-  };
-
-  var network = new vis.Network(container, data, options);});
-"""
-
-        def label_picker(frozenset):
-            """This function is only necessary, since frozensets cannot be easily cast to lists in Jinja2"""
-            return list(frozenset)[0]
-
-        def escape_strs(properties_dict):
-            properties_str = "{"
-            for k, v in properties_dict.items():
-                if type(v) == str and "'" in v:
-                    v.replace("'", "'")
-                    # v.replace('"', '\"')
-                properties_str += k + ":" + str(v) + ",<br>"
-            properties_str = properties_str[:-5] + "}"
-            return properties_str
-
-        template = Template(template_str)
-        graph_js = template.render(
-            nodes=nodes,
-            rels=relations,
-            element_id=element_id,
-            node_colors=self.global_node_colors,
-            label_picker=label_picker,
-            properties_serializer=escape_strs,
-        )
+            if self.cfg.python_mode == "kernel":
+                self.python_namespace
+            elif self._helpers_supported():
+                self.my_python
+            if self._helpers_supported():
+                self.my_shell
+        except Exception as e:
+            self.log.warning("Could not prewarm helper processes: %s", e)
+
+    def _layout_graph(self, nodes, relations):
+        """Node positions computed in the kernel, or `None` when the browser shall lay out the graph."""
+        if self.cfg.graph_layout != "kernel":
+            return None
+        if not layout_available():
+            self.log.warning("Kernel-side graph layout requires NumPy, falling back to the browser's layout")
+            return None
+        keys = {n.id: getattr(n, "layout_key", n.id) for n in nodes}
+        edges = [(keys.get(r.nodes[0].id), keys.get(r.nodes[1].id)) for r in relations]
+        positions = self._layout_cache.layout(list(keys.values()), edges, iterations=self.cfg.graph_layout_iterations)
+        return {node_id: positions[key] for node_id, key in keys.items()}
 
-        with open("/tmp/out.js", "w") as fp:
-            fp.write(graph_js)
+    def _response_to_js_graph(self, nodes, relations, element_id, live=False):
+        positions = self._layout_graph(nodes, relations)
+        graph_js = render_graph_js(nodes, relations, element_id, self.global_node_colors, positions, live=live)
+        if self.cfg.graph_js_dump_path:
+            # Opt-in for debugging the generated script outside of the notebook
+            with open(self.cfg.graph_js_dump_path, "w") as fp:
+                fp.write(graph_js)
         return graph_js
 
+    def _reduce_graph(self, nodes, relations):
+        """Sample or summarize graphs beyond the configured budget, so that vis.js does not freeze the browser."""
+        cfg = self.cfg
+        nodes, relations, note = reduce_graph(
+            nodes, relations, cfg.graph_max_nodes, cfg.graph_max_edges, mode=cfg.graph_reduction
+        )
+        if note:
+            self.send_response(self.iopub_socket, "stream", {"name": "stdout", "text": note + "\n"})
+        return nodes, relations
+
     def _color_nodes(self, nodes):
         for n in nodes:
-            labels_lst = list(n.labels)
-            if not labels_lst[0] in self.global_node_colors.keys():
+            label = first_label(n.labels)
+            if not label in self.global_node_colors.keys():
                 rgb = [str(random.randint(0, 255)) for _ in range(3)]
                 rgba = rgb + ["0.5"]
-                self.global_node_colors[labels_lst[0]] = ",".join(rgba)
+                self.global_node_colors[label] = ",".join(rgba)
 
     def _clean_input(self, code):
         lines = code.splitlines()
@@ -188,23 +307,90 @@ df = pd.DataFrame()"""
         else:
             return None, None
 
-    def _send_to_bash(self, code):
-        res = self.my_shell.run_command(code, timeout=self.cmd_timeout)
-        return res
-
     def _send_to_python(self, code):
         res = self.my_python.run_command(code, timeout=self.cmd_timeout)
         return res
 
-    def _push_to_python_env(self, header, content):
-        code = '''header = ast.literal_eval("""{}""")
-content = ast.literal_eval("""{}""")
-df = pd.DataFrame(content, columns=header)
-df'''.format(
-            str(header).replace("'", "\\'"), str(content).replace("'", "\\'")
-        )
-        res = self._send_to_python(code)
-        return res
+    def _stream_to_helper(self, magic, code, silent):
+        """Run a `%%bash` or `%%python` cell in its helper and send the output as stream messages while it runs."""
+        helper = self.my_shell if magic == "bash" else self.my_python
+
+        def write(text):
+            if not silent:
+                self.send_response(self.iopub_socket, "stream", {"name": "stdout", "text": text})
+
+        try:
+            max_bytes = self.cfg.helper_max_bytes
+            discarded = stream_command(helper, code, write, timeout=self.cmd_timeout, max_bytes=max_bytes)
+        except HelperInterrupted as e:
+            response = str(e)
+            if not e.alive:
+                # The helper is spawned anew with the next cell
+                with self._helpers_lock:
+                    if magic == "bash":
+                        self._my_shell = None
+                    else:
+                        self._my_python = None
+                response += f" The %%{magic} helper did not respond and was restarted, its state is lost."
+            return self._construct_and_send_text_response(response, silent, status="error")
+        except ValueError as e:
+            return self._construct_and_send_text_response(str(e), silent, status="error")
+        if discarded and not silent:
+            note = f"Output truncated at `helper_max_bytes`, {discarded:,} more bytes were discarded.\n"
+            self.send_response(self.iopub_socket, "stream", {"name": "stderr", "text": note})
+        return {"status": "ok", "execution_count": self.execution_count, "payload": [], "user_expressions": {}}
+
+    def _run_in_kernel(self, code, silent):
+        """Run a `%%python` cell in the kernel's namespace and send its output and rich displays while it runs."""
+
+        def stream(name, text):
+            if not silent:
+                self.send_response(self.iopub_socket, "stream", {"name": name, "text": text})
+
+        def display(data):
+            if not silent:
+                self.send_response(self.iopub_socket, "display_data", {"data": data, "metadata": {}})
+
+        try:
+            discarded = self.python_namespace.run(code, stream, display, max_bytes=self.cfg.helper_max_bytes)
+        except (Exception, KeyboardInterrupt, SystemExit):
+            # The traceback was sent as output of the cell, `sys.exit()` in a cell must not shut the kernel down
+            return {"status": "error", "execution_count": self.execution_count, "payload": [], "user_expressions": {}}
+        if discarded and not silent:
+            note = f"Output truncated at `helper_max_bytes`, {discarded:,} more bytes were discarded.\n"
+            self.send_response(self.iopub_socket, "stream", {"name": "stderr", "text": note})
+        return {"status": "ok", "execution_count": self.execution_count, "payload": [], "user_expressions": {}}
+
+    def _result_collector(self):
+        """Where the records of a result are collected for the next `%%python` cell.
+
+        The records themselves are only kept, when they are used as they are, i.e., in the kernel's namespace, or when
+        a helper is running anyway. Otherwise their plain values are collected column-wise batch by batch, so that the
+        driver's records are not retained next to the shown output.
+        """
+        if self.cfg.python_mode == "kernel" or self._my_python is not None:
+            return []
+        return ResultColumns()
+
+    def _sync_python_env(self):
+        """Hand the latest Cypher result and query plan over to the `%%python` helper, if they changed since."""
+        payload = {}
+        if self._python_env_result is not None:
+            payload.update(result_payload(*self._python_env_result, adjacency=self.cfg.python_adjacency))
+        if self._python_env_plan is not None:
+            payload["plan"] = self._python_env_plan
+        if not payload:
+            return
+        if self.cfg.python_mode == "kernel":
+            records = self._python_env_result[0] if self._python_env_result is not None else None
+            if isinstance(records, ResultColumns):
+                records = None
+            self._python_env_result, self._python_env_plan = None, None
+            self.python_namespace.load(payload, records)
+            return
+        path = write_handoff(payload)
+        self._python_env_result, self._python_env_plan = None, None
+        self._send_to_python(f"_cypher_kernel_load({path!r})")
 
     def _construct_and_send_text_response(self, response, is_silent, status="ok"):
         if not is_silent:
@@ -219,29 +405,32 @@ df'''.format(
         }
         return exec_result
 
-    def _construct_and_send_html_response(self, nodes, relations, is_silent, status="ok"):
+    def _construct_and_send_html_response(self, nodes, relations, is_silent, status="ok", live=False):
         element_id = uuid.uuid4()
-        graph_js = self._response_to_js_graph(nodes, relations, element_id)
-
-        graph_HTML_tmpl = """<link href="https://cdnjs.cloudflare.com/ajax/libs/vis/4.21.0/vis.min.css" rel="stylesheet" type="text/css">
-        <div id="{{ element_id }}"></div>
-        """
-        html_template = Template(graph_HTML_tmpl)
-        graph_HTML = html_template.render(element_id=element_id)
+        graph_js = self._response_to_js_graph(nodes, relations, element_id, live=live)
+        graph_HTML = render_graph_html(element_id)
 
+        if not self._vis_injected:
+            # The library is sent once per session, later cells only send their graph data
+            vis_msg = {"data": {"application/javascript": vis_library_js()}}
+            self.send_response(self.iopub_socket, "display_data", vis_msg)
+            self._vis_injected = True
         html_msg = {"data": {"text/html": graph_HTML}, "execution_count": self.execution_count}
         js_msg = {"data": {"application/javascript": graph_js}}
-        self.send_response(self.iopub_socket, "display_data", js_msg)
+        # The container must exist before the script draws into it
         self.send_response(self.iopub_socket, "display_data", html_msg)
+        self.send_response(self.iopub_socket, "display_data", js_msg)
 
         exec_result = {"status": status, "execution_count": self.execution_count, "payload": [], "user_expressions": {}}
         return exec_result
 
-    def _process_response(self, response):
-        """Split nodes and relations from response records for later visualization"""
+    def _process_response(self, response, table=None):
+        """Split nodes and relations from response records for later visualization and add the records to a table"""
         nodes, relations = set([]), set([])
-        text_response = ""
         for record in response:
+            if table is None:
+                table = ResultTable(record.keys(), self.cfg.table_max_rows, self.cfg.table_max_width)
+            has_values = False
             for el in record:
                 if isinstance(el, Node):
                     nodes.add(el)
@@ -249,49 +438,712 @@ df'''.format(
                     # Then it is a relation wrapped into an abstract base class
                     relations.add(el)
                 else:
-                    text_response += str(el) + "\n"
-        return nodes, relations, text_response
+                    has_values = True
+            table.add(record.values(), has_values)
+        return nodes, relations, table
 
-    def do_execute(self, code, silent, store_history=True, user_expressions=None, allow_stdin=False):
+    @staticmethod
+    def _close_records(records):
+        """Close a result generator, unless a stuck worker thread, which was left behind, is still running it."""
+        if records.gi_running:
+            return
+        try:
+            records.close()
+        except ValueError:
+            # The worker thread resumed the generator in the meantime
+            pass
+
+    def _discard_pending_result(self):
+        if self._pending_result is not None:
+            # Closing the generator closes its session, which discards the remaining records on the server
+            self._close_records(self._pending_result)
+            self._pending_result = None
+            self._pending_tag = None
+
+    def _flush_batch(self, batch, nodes, relations, table):
+        with self._metrics.timed("process"):
+            batch_nodes, batch_relations, table = self._process_response(batch, table)
+        nodes |= batch_nodes
+        relations |= batch_relations
+        return table
+
+    def _send_table(self, table, silent, display_id=None, final=True):
+        """Send a table, a table that is still being filled is sent with a display id and later updated in place.
 
+        Returns the display id of the table, if any. A result without rows is shown as "(no rows)", so that an empty
+        result does not look like a cell that did not run.
+        """
+        if silent:
+            return display_id
+        if table is None and final:
+            self.send_response(self.iopub_socket, "display_data", {"data": {"text/plain": "(no rows)"}, "metadata": {}})
+            return display_id
+        if table is None or not table.has_values:
+            return display_id
+        with self._metrics.timed("render"):
+            data = {"text/plain": table.render_text(), "text/html": table.render_html()}
+        content = {"data": data, "metadata": {}}
+        if display_id is not None:
+            content["transient"] = {"display_id": display_id}
+            self.send_response(self.iopub_socket, "update_display_data", content)
+        elif not final:
+            display_id = uuid.uuid4().hex
+            content["transient"] = {"display_id": display_id}
+            self.send_response(self.iopub_socket, "display_data", content)
+        else:
+            self.send_response(self.iopub_socket, "display_data", content)
+        return display_id
+
+    @staticmethod
+    def _pull_batch(records, max_count, max_size):
+        """Runs on the query worker thread and pulls records until `max_count` records or `max_size` bytes.
+
+        The size of a record is the length of its values as UTF-8 text. Returns the batch, its size, whether the result
+        is exhausted, and the result summary, which is only known for exhausted results.
+        """
+        batch, size = [], 0
+        while True:
+            try:
+                record = next(records)
+            except StopIteration as stop:
+                return batch, size, True, stop.value
+            batch.append(record)
+            size += sum(_text_size(str(el)) for el in record)
+            if len(batch) >= max_count or (max_size is not None and size >= max_size):
+                return batch, size, False, None
+
+    def _wait_for(self, future, tag, executor=None):
+        """Wait for work on the query worker thread, while staying responsive to interrupts from Jupyter.
+
+        On interrupt, the tagged transaction is terminated on the server, so that it stops burning CPU there. A stuck
+        query worker is replaced, while work of another `executor`, e.g., of `%%parallel`, is left to its owner.
+        """
+        try:
+            while True:
+                try:
+                    return future.result(timeout=0.1)
+                except concurrent.futures.TimeoutError:
+                    continue
+        except KeyboardInterrupt:
+            try:
+                self.conn.terminate(tag)
+            except Exception as e:
+                self.log.warning("Could not terminate transaction %s: %s", tag, e)
+            try:
+                # The terminated transaction fails the pending fetch on the worker thread
+                future.result(timeout=self.cancel_timeout)
+            except concurrent.futures.TimeoutError:
+                if executor is None:
+                    # The worker is stuck, leave it behind without its queued work and use a fresh one
+                    self._query_executor.shutdown(wait=False, cancel_futures=True)
+                    self._query_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            except Exception:
+                pass
+            raise
+
+    def _consume_result(self, records, tag, silent, collect=None):
+        """Pull records on the worker thread until the result is exhausted or the row/byte cap is reached.
+
+        Records are processed per batch of `fetch_size` records while the next ones are still transferred. Values
+        are shown as a table of at most `table_max_rows` rows. Results, which take longer than
+        `table_refresh_interval` seconds, show the rows fetched so far and refresh them while further batches arrive.
+        Returns the collected nodes and relations and whether records are left. Consumed records are passed to
+        `collect.extend` if given.
+        """
+        nodes, relations = set([]), set([])
+        table, display_id = None, None
+        rows, size = 0, 0
+        last_refresh = time.perf_counter()
+        while True:
+            max_count = min(self.fetch_size, self.max_rows - rows) if self.max_rows else self.fetch_size
+            max_size = self.max_bytes - size if self.max_bytes else None
+            future = self._query_executor.submit(self._pull_batch, records, max_count, max_size)
+            with self._metrics.timed("fetch"):
+                batch, batch_size, exhausted, summary = self._wait_for(future, tag)
+            rows += len(batch)
+            size += batch_size
+            self.last_result_stats = {"rows": rows, "size": size}
+            self._metrics.rows += len(batch)
+            self._metrics.bytes += batch_size
+            if summary is not None:
+                self._metrics.add_summary(summary)
+                self._metrics.add_time("pool_wait", self.conn.last_pool_wait or 0.0)
+            if collect is not None:
+                collect.extend(batch)
+            table = self._flush_batch(batch, nodes, relations, table)
+            if exhausted:
+                self._send_table(table, silent, display_id)
+                return nodes, relations, False
+            if (self.max_rows and rows >= self.max_rows) or (self.max_bytes and size >= self.max_bytes):
+                self._send_table(table, silent, display_id)
+                return nodes, relations, True
+            if time.perf_counter() - last_refresh >= self.table_refresh_interval:
+                display_id = self._send_table(table, silent, display_id, final=False)
+                last_refresh = time.perf_counter()
+
+    def _send_graph(self, nodes, relations, silent):
+        if self.connect_result_nodes and not silent:
+            exec_result = self._accumulate_graph(nodes, relations)
+            return exec_result
+        if not silent and nodes:
+            # Only return the visual output when there are actually nodes and relations,
+            # as long as auto connection is not implemented also put it there when only nodes exist
+            with self._metrics.timed("render"):
+                nodes, relations = self._reduce_graph(nodes, relations)
+                self._color_nodes(nodes)
+                exec_result = self._construct_and_send_html_response(nodes, relations, silent, status="ok")
+            return exec_result
+        exec_result = {"status": "ok", "execution_count": self.execution_count, "payload": [], "user_expressions": {}}
+        return exec_result
+
+    def _connect_nodes(self, new_ids, known_ids):
+        """Fetch the relationships between new nodes and all known nodes in one query.
+
+        On interrupt, the query is terminated like any other and `KeyboardInterrupt` is passed on to the cell.
+        """
+        tag = uuid.uuid4().hex
+        parameters = {"new": new_ids, "known": known_ids}
+        future = self._query_executor.submit(
+            lambda: [record["r"] for record in self.conn.stream(CONNECT_QUERY, parameters, tag=tag)]
+        )
+        try:
+            return self._wait_for(future, tag)
+        except QUERY_ERRORS as e:
+            # The result itself is complete, it is only shown without the connecting relationships
+            self.log.warning("Could not fetch relationships between result nodes: %s", e)
+            return []
+
+    def _accumulate_graph(self, nodes, relations):
+        """Add a result to the accumulated graph and send only the changes, when the shown graph can receive them."""
+        exec_result = {"status": "ok", "execution_count": self.execution_count, "payload": [], "user_expressions": {}}
+        if not nodes and not relations:
+            return exec_result
+        store = self._graph_store
+        new_ids = [n.id for n in nodes if n.id not in store.nodes]
+        if new_ids:
+            relations = set(relations) | set(self._connect_nodes(new_ids, list(store.nodes) + new_ids))
+        with self._metrics.timed("render"):
+            diff = store.add(nodes, relations, self.cfg.graph_max_nodes, self.cfg.graph_max_edges)
+            self._color_nodes(diff.nodes)
+            if self._graph_comm is None:
+                # Nothing to update, e.g., in frontends without comm support, so the whole graph is sent
+                return self._send_graph_store()
+            if diff:
+                positions = self._layout_graph(list(store.nodes.values()), list(store.relationships.values()))
+                self._graph_comm.send(graph_diff_payload(diff, self.global_node_colors, positions))
+        self.send_response(self.iopub_socket, "stream", {"name": "stdout", "text": diff.describe() + "\n"})
+        return exec_result
+
+    def _send_graph_store(self):
+        nodes, relations = list(self._graph_store.nodes.values()), list(self._graph_store.relationships.values())
+        return self._construct_and_send_html_response(nodes, relations, False, live=True)
+
+    def _graph_magic(self, magic_args, silent):
+        """`%%graph` shows the accumulated graph anew, e.g., after reloading the page, `%%graph clear` empties it."""
+        if magic_args == "clear":
+            diff = self._graph_store.clear()
+            self._layout_cache.clear()
+            if self._graph_comm is not None and diff:
+                self._graph_comm.send(graph_diff_payload(diff, self.global_node_colors))
+            return self._construct_and_send_text_response("Accumulated graph cleared.", silent)
+        if silent:
+            return {"status": "ok", "execution_count": self.execution_count, "payload": [], "user_expressions": {}}
+        return self._send_graph_store()
+
+    def _run_read_query(self, query, parameters, tag):
+        """Runs on a thread of `%%parallel` and pulls a complete result, or as much of it as the caps allow."""
+        started = time.perf_counter()
+        records = self.conn.stream(
+            query,
+            parameters,
+            fetch_size=self.fetch_size,
+            tag=tag,
+            timeout=self.query_timeout,
+            access_mode=READ_ACCESS,
+        )
+        try:
+            batch, size, exhausted, summary = self._pull_batch(records, self.max_rows or sys.maxsize, self.max_bytes)
+        finally:
+            records.close()
+        return batch, size, not exhausted, summary, time.perf_counter() - started
+
+    def _execute_parallel(self, code, silent):
+        """Run the read statements of a `%%parallel` cell concurrently in read sessions of their own.
+
+        At most `parallel_max_concurrency` statements run at once. The results are shown in statement order as
+        soon as all results before them are shown, and the wall time is reported against the summed query times.
+        """
+        statements = split_statements(code)
+        writes = [number for number, statement in enumerate(statements, 1) if is_write_query(statement)]
+        if writes:
+            response = f"%%parallel only runs read queries, statement {', '.join(map(str, writes))} may write."
+            return self._construct_and_send_text_response(response, silent, status="error")
+        if not statements:
+            return self._construct_and_send_text_response("%%parallel needs statements to run.", silent)
+
+        started = time.perf_counter()
+        tags = [uuid.uuid4().hex for _ in statements]
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(self.cfg.parallel_max_concurrency, 1))
+        futures = [
+            executor.submit(self._run_read_query, statement, self._parameters.for_query(statement), tag)
+            for statement, tag in zip(statements, tags)
+        ]
+        query_time, failed = 0.0, 0
+        exec_result = None
+        try:
+            for number, (future, tag) in enumerate(zip(futures, tags), 1):
+                try:
+                    batch, size, capped, summary, elapsed = self._wait_for(future, tag, executor)
+                except QUERY_ERRORS as e:
+                    failed += 1
+                    response = f"Statement {number} of {len(statements)} failed: {_error_message(e)}\n"
+                    self.send_response(self.iopub_socket, "stream", {"name": "stderr", "text": response})
+                    self._capture_parallel_statement(statements[number - 1], "error")
+                    continue
+                query_time += elapsed
+                self._capture_parallel_statement(statements[number - 1], "ok", len(batch), size, elapsed, summary)
+                self._metrics.rows += len(batch)
+                self._metrics.bytes += size
+                self._metrics.add_summary(summary)
+                nodes, relations, table = self._process_response(batch)
+                self._send_table(table, silent)
+                if capped and not silent:
+                    note = f"Output of statement {number} capped, its remaining records were discarded.\n"
+                    self.send_response(self.iopub_socket, "stream", {"name": "stdout", "text": note})
+                collected = self._result_collector()
+                collected.extend(batch)
+                self._python_env_result = (collected, nodes, relations)
+                exec_result = self._send_graph(nodes, relations, silent)
+        except KeyboardInterrupt:
+            for future, tag in zip(futures, tags):
+                if not future.done():
+                    future.cancel()
+                    try:
+                        self.conn.terminate(tag)
+                    except Exception as e:
+                        self.log.warning("Could not terminate transaction %s: %s", tag, e)
+            response = "Queries interrupted, their transactions were terminated on the server."
+            return self._construct_and_send_text_response(response, silent, status="error")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        wall_time = time.perf_counter() - started
+        if not silent:
+            speedup = f" ({query_time / wall_time:.1f}x)" if wall_time else ""
+            report = (
+                f"{len(statements)} queries in {wall_time:.3f} s wall time, "
+                f"{query_time:.3f} s summed query time{speedup}\n"
+            )
+            self.send_response(self.iopub_socket, "stream", {"name": "stdout", "text": report})
+        if failed:
+            return {"status": "error", "execution_count": self.execution_count, "payload": [], "user_expressions": {}}
+        return exec_result
+
+    def _execute_statements(self, statements, silent):
+        """Run the statements of a multi-statement cell and send the output of each statement as soon as it is done.
+
+        All statements run in one explicit transaction, which is rolled back when a statement fails. With
+        `multi_statement_mode: 'autocommit'`, or when a statement manages its own transactions, every statement is
+        committed on its own and the statements before a failing one stay committed. Records beyond the caps are
+        discarded, as a transaction cannot be continued with `%%more`.
+        """
+        autocommit = self.multi_statement_mode == "autocommit" or any(needs_autocommit(s) for s in statements)
+        tag = uuid.uuid4().hex
+        tx, number = None, 0
+        exec_result = None
+        try:
+            if not autocommit:
+                future = self._query_executor.submit(
+                    self.conn.begin, fetch_size=self.fetch_size, tag=tag, timeout=self.query_timeout
+                )
+                tx = self._wait_for(future, tag)
+            for number, statement in enumerate(statements, 1):
+                parameters = self._parameters.for_query(statement)
+                if tx is not None:
+                    records = tx.stream(statement, parameters)
+                else:
+                    records = self.conn.stream(
+                        statement, parameters, fetch_size=self.fetch_size, tag=tag, timeout=self.query_timeout
+                    )
+                collected = self._result_collector()
+                try:
+                    nodes, relations, has_more = self._consume_result(records, tag, silent, collect=collected)
+                finally:
+                    # A failing close must not hide an interrupt
+                    self._close_records(records)
+                if has_more and not silent:
+                    note = f"Output of statement {number} capped, its remaining records were discarded.\n"
+                    self.send_response(self.iopub_socket, "stream", {"name": "stdout", "text": note})
+                self._python_env_result = (collected, nodes, relations)
+                exec_result = self._send_graph(nodes, relations, silent)
+            if tx is not None:
+                # A failed commit rolls the transaction back on the server
+                committing, tx = tx, None
+                try:
+                    self._wait_for(self._query_executor.submit(committing.commit), tag)
+                except (*QUERY_ERRORS, KeyboardInterrupt) as e:
+                    if isinstance(e, KeyboardInterrupt):
+                        response = "Committing the transaction was interrupted, it may or may not have been committed."
+                    else:
+                        reason = _error_message(e)
+                        response = f"Committing the transaction failed: {reason}. No statement was committed."
+                    return self._construct_and_send_text_response(response, silent, status="error")
+            return exec_result
+        except (*QUERY_ERRORS, KeyboardInterrupt) as e:
+            if isinstance(e, KeyboardInterrupt):
+                reason = "was interrupted, its transaction was terminated on the server"
+            else:
+                reason = f"failed: {_error_message(e)}"
+            if number:
+                response = f"Statement {number} of {len(statements)} {reason}."
+            else:
+                response = f"Beginning the transaction {reason}."
+            if tx is not None:
+                response += " The transaction was rolled back."
+            elif number > 1:
+                response += f" Statements 1 to {number - 1} were committed."
+            return self._construct_and_send_text_response(response, silent, status="error")
+        finally:
+            if tx is not None:
+                try:
+                    self._query_executor.submit(tx.rollback).result(timeout=self.cancel_timeout)
+                except Exception as e:
+                    self.log.warning("Could not roll back transaction %s: %s", tag, e)
+
+    def _bulk_import(self, magic_args, code, silent):
+        """Stream a file into the database with batched `UNWIND $rows` queries and show the progress live."""
+        cfg = self.cfg
+        try:
+            args = parse_import_args(magic_args, cfg.import_batch_size, cfg.import_writers, cfg.import_retries)
+            query = import_query(code)
+        except ValueError as e:
+            return self._construct_and_send_text_response(str(e), silent, status="error")
+        chunks = read_chunks(args.path, args.format, args.batch_size, args.delimiter)
+        tag = uuid.uuid4().hex
+        importer = BulkImporter(
+            self.conn,
+            query,
+            args.batch_size,
+            args.writers,
+            args.partition,
+            args.retries,
+            tag,
+            parameters=self._parameters.for_query(query),
+        )
+        display_id = uuid.uuid4().hex
+        shown = []
+
+        def progress(importer):
+            text = f"{importer.rows:,} rows, {importer.rows_per_second:,.0f} rows/s"
+            msg_type = "update_display_data" if shown else "display_data"
+            content = {"data": {"text/plain": text}, "metadata": {}, "transient": {"display_id": display_id}}
+            self.send_response(self.iopub_socket, msg_type, content)
+            shown.append(display_id)
+
+        # Imports write, so cached results and the schema are outdated afterwards, also when they fail halfway
+        self._result_cache.clear()
+        self._schema.invalidate()
+        status = "ok"
+        try:
+            importer.run(chunks, progress=None if silent else progress)
+            response = importer.report()
+        except KeyboardInterrupt:
+            try:
+                self.conn.terminate(tag)
+            except Exception as e:
+                self.log.warning("Could not terminate import transactions %s: %s", tag, e)
+            status, response = "error", f"Import interrupted, {importer.rows:,} rows were imported."
+        except Exception as e:
+            # Broken files and failing queries alike, the batches written so far stay committed
+            reason = getattr(e, "message", None) or str(e)
+            status, response = "error", f"Import failed after {importer.rows:,} rows: {reason}"
+        self._metrics.rows += importer.rows
+        for name, value in importer.counters.items():
+            self._metrics.counters[name] = self._metrics.counters.get(name, 0) + value
+        if shown:
+            progress(importer)
+        return self._construct_and_send_text_response(response, silent, status=status)
+
+    def _set_parameters(self, magic_args, code, silent):
+        """`%%params` sets parameters from a YAML mapping, `%%params --python a b` binds the variables `a` and `b` of
+        the `%%python` helper, `%%params clear` removes all parameters, and a bare `%%params` lists them.
+        """
+        names = magic_args.split()
+        try:
+            if names[:1] == ["clear"]:
+                self._parameters.clear()
+            elif names[:1] == ["--python"]:
+                self._parameters.update(self._parameters_from_python(names[1:]))
+            else:
+                self._parameters.update(parse_parameters(code))
+        except ValueError as e:
+            return self._construct_and_send_text_response(str(e), silent, status="error")
+        return self._construct_and_send_text_response(self._parameters.describe(), silent)
+
+    def _parameters_from_python(self, names):
+        if not names:
+            raise ValueError("%%params --python: name the variables to bind, e.g., `%%params --python name year`")
+        invalid = [name for name in names if not name.isidentifier()]
+        if invalid:
+            raise ValueError(f"%%params: invalid variable names: {', '.join(invalid)}")
+        if self.cfg.python_mode != "kernel" and not self._helpers_supported():
+            raise ValueError(f"%%params --python: needs `python_mode: 'kernel'` on {platform.system()}")
+        if self.cfg.python_mode == "kernel":
+            self._sync_python_env()
+            try:
+                return self.python_namespace.values(names)
+            except ValueError as e:
+                raise ValueError(f"%%params --python: {e}") from None
+        fd, path = tempfile.mkstemp(prefix="cypher_kernel_", suffix=".pickle")
+        os.close(fd)
+        try:
+            self._sync_python_env()
+            args = ", ".join(repr(name) for name in [path] + names)
+            response = self._send_to_python(f"_cypher_kernel_dump({args})").strip()
+            if response:
+                # The helper prints missing variables and errors instead of writing the file
+                raise ValueError(f"%%params --python: {response}")
+        except ValueError:
+            os.remove(path)
+            raise
+        return read_handoff(path)
+
+    def _send_query_plan(self, mode, query, silent):
+        """Run a query with an `EXPLAIN` or `PROFILE` prefix and render the plan from its result summary."""
+        profiled = mode == "profile"
+        if profiled and is_write_query(query):
+            # Profiling runs the query, so its writes outdate cached results and the schema like in a plain cell
+            self._result_cache.clear()
+            self._schema.invalidate()
+        tag = uuid.uuid4().hex
+        future = self._query_executor.submit(
+            self.conn.summarize,
+            f"{mode.upper()} {query}",
+            self._parameters.for_query(query),
+            tag=tag,
+            timeout=self.query_timeout,
+        )
+        try:
+            summary = self._wait_for(future, tag)
+        except QUERY_ERRORS as e:
+            return self._construct_and_send_text_response(_error_message(e), silent, status="error")
+        except KeyboardInterrupt:
+            response = "Query interrupted, its transaction was terminated on the server."
+            return self._construct_and_send_text_response(response, silent, status="error")
+
+        plan = summary.profile if profiled else summary.plan
+        if not plan:
+            return self._construct_and_send_text_response("The server did not return a plan.", silent, status="error")
+        self._python_env_plan = structured_plan(plan)
+        if not silent:
+            rows = plan_rows(plan)
+            data = {"text/plain": render_plan_text(rows, profiled), "text/html": render_plan_html(rows, profiled)}
+            self.send_response(self.iopub_socket, "display_data", {"data": data, "metadata": {}})
+        exec_result = {"status": "ok", "execution_count": self.execution_count, "payload": [], "user_expressions": {}}
+        return exec_result
+
+    def _report_config_problems(self, silent):
+        cfg = self.cfg
+        if cfg is not self._reported_cfg:
+            self._reported_cfg = cfg
+            if cfg.error and not silent:
+                msg = f"{cfg.error}\nUsing the default configuration until the file is fixed.\n"
+                self.send_response(self.iopub_socket, "stream", {"name": "stderr", "text": msg})
+            if cfg.unknown_keys and not silent:
+                keys = ", ".join(cfg.unknown_keys)
+                msg = f"Ignoring unknown configuration keys in {self._config_loader.path}: {keys}\n"
+                self.send_response(self.iopub_socket, "stream", {"name": "stderr", "text": msg})
+
+    def send_response(self, *args, **kwargs):
+        started = time.perf_counter()
+        super().send_response(*args, **kwargs)
+        self._metrics.add_time("send", time.perf_counter() - started)
+
+    def finish_metadata(self, parent, metadata, reply_content):
+        metadata = super().finish_metadata(parent, metadata, reply_content)
+        # The timing breakdown of the cell travels with its execute reply
+        metadata["cypher_kernel"] = self._metrics.as_dict()
+        return metadata
+
+    def _finish_metrics(self, exec_result, silent):
+        metrics = self._metrics
+        if exec_result is not None:
+            metrics.status = exec_result["status"]
+        metrics.finish()
+        if self.cfg.metrics_footer and not silent:
+            self.send_response(self.iopub_socket, "stream", {"name": "stderr", "text": metrics.footer()})
+        if self.cfg.metrics_file:
+            exporter = self._metrics_exporter
+            if exporter is None or (exporter.path, exporter.format) != (self.cfg.metrics_file, self.cfg.metrics_format):
+                self._metrics_exporter = exporter = MetricsExporter(self.cfg.metrics_file, self.cfg.metrics_format)
+            try:
+                exporter.export(metrics)
+            except OSError as e:
+                self.log.warning("Could not write metrics to %s: %s", self.cfg.metrics_file, e)
+        if self.cfg.workload_file and self._workload_query is not None:
+            self._append_workload(self._workload_query, metrics)
+
+    def _append_workload(self, query, metrics):
+        entry = workload_entry(query, self._parameters.for_query(query), None, metrics)
+        try:
+            append_entry(self.cfg.workload_file, entry)
+        except OSError as e:
+            self.log.warning("Could not write the workload to %s: %s", self.cfg.workload_file, e)
+
+    def _capture_parallel_statement(self, statement, status, rows=0, size=0, elapsed=None, summary=None):
+        """Capture a statement of a `%%parallel` cell as a workload entry of its own, as it ran concurrently."""
+        if not self.cfg.workload_file:
+            return
+        metrics = CellMetrics(self.execution_count, "parallel")
+        metrics.status, metrics.rows, metrics.bytes = status, rows, size
+        if elapsed is not None:
+            metrics.add_time("fetch", elapsed)
+        metrics.add_summary(summary)
+        self._append_workload(statement, metrics)
+
+    def do_execute(self, code, silent, store_history=True, user_expressions=None, allow_stdin=False):
         clean_input = self._clean_input(code)
         magic, magic_code = self._is_magic(code)
+        magic_args = ""
+        if magic:
+            magic, _, magic_args = magic.partition(" ")
+            magic_args = magic_args.strip()
+
+        self._metrics = CellMetrics(self.execution_count, magic or "cypher")
+        self._workload_query = None
+        self._report_config_problems(silent)
+        exec_result = None
+        try:
+            exec_result = self._execute(code, silent, magic, magic_args, magic_code)
+        finally:
+            self._finish_metrics(exec_result, silent)
+        return exec_result
+
+    def _execute(self, code, silent, magic, magic_args, magic_code):
+        if magic in ("bash", "python") and not self._helpers_supported():
+            if magic == "bash" or self.cfg.python_mode != "kernel":
+                return self._unsupported_helper_response(magic, silent)
         if magic == "bash" and magic_code:
-            response = self._send_to_bash(magic_code)
-            exec_result = self._construct_and_send_text_response(response, silent)
+            exec_result = self._stream_to_helper(magic, magic_code, silent)
             return exec_result
         elif magic == "python":
-            # TODO! implement me, convert latest cypher query to networkx graph
-            response = self._send_to_python(magic_code)
-            exec_result = self._construct_and_send_text_response(response, silent)
+            if self.cfg.python_mode == "kernel":
+                try:
+                    self.python_namespace
+                except ImportError as e:
+                    response = f"%%python cells in the kernel require pandas and networkx: {e}"
+                    return self._construct_and_send_text_response(response, silent, status="error")
+                self._sync_python_env()
+                exec_result = self._run_in_kernel(magic_code, silent)
+            else:
+                self._sync_python_env()
+                exec_result = self._stream_to_helper(magic, magic_code, silent)
             return exec_result
-        elif magic == None:
-            # then it is a query to Cypher
+        elif magic == None or magic == "more":
+            # then it is a query to Cypher or the continuation of a capped one
+            if magic == "more":
+                if self._pending_result is None:
+                    response = "There is no pending result to fetch more records from."
+                    exec_result = self._construct_and_send_text_response(response, silent, status="error")
+                    return exec_result
+                records, tag = self._pending_result, self._pending_tag
+                self._pending_result, self._pending_tag = None, None
+                cache_key, cached = None, None
+            else:
+                self._discard_pending_result()
+                self._seen_parameters.update(parameter_names(code))
+                if is_write_query(code):
+                    # Anything that writes may change the results of cached queries and the schema
+                    self._result_cache.clear()
+                    self._schema.invalidate()
+                statements = split_statements(code)
+                if len(statements) > 1:
+                    self._workload_query = code
+                    exec_result = self._execute_statements(statements, silent)
+                    return exec_result
+                query = statements[0] if statements else code
+                parameters = self._parameters.for_query(query)
+                self._result_cache.resize(self.cfg.cache_max_entries, self.cfg.cache_max_bytes)
+                if self.cfg.cache_enabled and is_cacheable(query):
+                    cache_key = self._result_cache.key(query, parameters)
+                else:
+                    cache_key = None
+                cached = self._result_cache.get(cache_key) if cache_key else None
+                tag = uuid.uuid4().hex
+                if cached is not None:
+                    # Cached records take the same path as fresh ones, so that the output looks the same
+                    records = (record for record in cached)
+                else:
+                    self._workload_query = query
+                    # Run the actual cypher query, records are fetched lazily on the worker thread while consuming them
+                    records = self.conn.stream(
+                        query, parameters, fetch_size=self.fetch_size, tag=tag, timeout=self.query_timeout
+                    )
+            # Complete results for the cache need their records
+            collected = [] if cache_key and cached is None else self._result_collector()
             try:
-                # Run the actual cypher query
-                response = self.conn.query(code)
-            except Neo4jError as e:
+                nodes, relations, has_more = self._consume_result(records, tag, silent, collect=collected)
+            except QUERY_ERRORS as e:
                 # Send an error message to the text output
-                exec_result = self._construct_and_send_text_response(e.message, silent, status="error")
+                exec_result = self._construct_and_send_text_response(_error_message(e), silent, status="error")
+                return exec_result
+            except KeyboardInterrupt:
+                response = "Query interrupted, its transaction was terminated on the server."
+                exec_result = self._construct_and_send_text_response(response, silent, status="error")
                 return exec_result
 
-            nodes, relations, text_response = self._process_response(response)
-
-            # TODO: push results to python env via to_df() method on results
-            # df_header, df_content = parse_output_to_python(text_response)
-            # if df_header and df_content:
-            #     _ = self._push_to_python_env(df_header, df_content)
+            if has_more:
+                self._pending_result, self._pending_tag = records, tag
+                if not silent:
+                    note = "Output capped, run a `%%more` cell to fetch the next records.\n"
+                    self.send_response(self.iopub_socket, "stream", {"name": "stdout", "text": note})
+            elif cache_key and cached is None:
+                # Only complete results are cached
+                self._result_cache.put(cache_key, collected, self.last_result_stats["size"])
 
-            if not silent and nodes:
-                # Only return the visual output when there are actually nodes and relations,
-                # as long as auto connection is not implemented also put it there when only nodes exist
-                self._color_nodes(nodes)
-                exec_result = self._construct_and_send_html_response(nodes, relations, silent, status="ok")
-                return exec_result
-            if not silent:
-                # No matter what, this is the text response
-                exec_result = self._construct_and_send_text_response(text_response, silent)
-                return exec_result
+            # The result is handed over to the python helper lazily with the next `%%python` cell
+            self._python_env_result = (collected, nodes, relations)
+            try:
+                exec_result = self._send_graph(nodes, relations, silent)
+            except KeyboardInterrupt:
+                # Interrupted while fetching the relationships between the result nodes
+                response = "Query interrupted, its transaction was terminated on the server."
+                exec_result = self._construct_and_send_text_response(response, silent, status="error")
+            return exec_result
+        elif magic == "parallel":
+            exec_result = self._execute_parallel(magic_code, silent)
+            return exec_result
+        elif magic == "graph":
+            exec_result = self._graph_magic(magic_args, silent)
+            return exec_result
+        elif magic == "params":
+            exec_result = self._set_parameters(magic_args, magic_code, silent)
+            return exec_result
+        elif magic == "import":
+            exec_result = self._bulk_import(magic_args, magic_code, silent)
+            return exec_result
+        elif magic in ("explain", "profile"):
+            exec_result = self._send_query_plan(magic, magic_code, silent)
+            return exec_result
+        elif magic == "cache":
+            if (magic_args or magic_code.strip()) == "clear":
+                self._result_cache.clear()
+                response = "Result cache cleared."
+            else:
+                response = self._result_cache.stats()
+            exec_result = self._construct_and_send_text_response(response, silent)
+            return exec_result
+        elif magic == "pool":
+            pool_wait = self.conn.last_pool_wait
+            response = "\n".join(
+                [
+                    f"Pool size: {self.conn.pool_size}",
+                    f"Idle sessions: {self.conn.idle_sessions}",
+                    f"Last pool wait: {'n/a' if pool_wait is None else f'{pool_wait * 1000:.1f} ms'}",
+                ]
+            )
+            exec_result = self._construct_and_send_text_response(response, silent)
+            return exec_result
         else:
             response = f"Unknown magic type: {magic}"
             exec_result = self._construct_and_send_text_response(response, silent, status="error")
@@ -299,16 +1151,27 @@ df'''.format(
         # TODO: What should the exec_result be in case of silence?
         return None
 
-    def do_complete(self, code, cursor_pos):
-        space_idxs = [i for i, l in enumerate(code) if l == " "]
-        low_idxs = [s for s in space_idxs if s < cursor_pos]
-        if low_idxs:
-            low_cp = max([s for s in space_idxs if s < cursor_pos]) + 1
-            key_start = code[low_cp:cursor_pos]
-        else:
-            low_cp = 0
-            key_start = code[:cursor_pos]
+    def do_shutdown(self, restart):
+        self._discard_pending_result()
+        self.conn.close()
+        self._query_executor.shutdown(wait=False)
+        return {"status": "ok", "restart": restart}
 
-        matches = [k for k in self.keywords if k.startswith(key_start)]
-        content = {"matches": matches, "cursor_start": low_cp, "cursor_end": cursor_pos, "metadata": {}, "status": "ok"}
+    def do_complete(self, code, cursor_pos):
+        # Completion only reads the latest schema snapshot, a stale one is refreshed in the background
+        self._schema.maybe_refresh()
+        matches, cursor_start = complete(
+            code,
+            cursor_pos,
+            self._schema.snapshot,
+            self._keyword_index,
+            parameters=self._seen_parameters | set(self._parameters),
+        )
+        content = {
+            "matches": matches,
+            "cursor_start": cursor_start,
+            "cursor_end": cursor_pos,
+            "metadata": {},
+            "status": "ok",
+        }
         return content
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+
+# Upper bound of pairwise distances per block of the repulsion computation, keeps memory flat for large graphs
+_BLOCK_ELEMENTS = 2_000_000
+
+
+def layout_available():
+    try:
+        import numpy
+    except ImportError:
+        return False
+    return True
+
+
+class LayoutCache:
+    """Kernel-side force-directed layout, which remembers the position of every node it has placed.
+
+    Nodes that were placed by an earlier layout keep their position and only new nodes are moved, so re-rendering
+    an overlapping result reuses the existing layout instead of recomputing it. At most `max_positions` positions
+    are remembered, those of the nodes that were not laid out for the longest time are forgotten first. NumPy is
+    required.
+    """
+
+    def __init__(self, size=1000.0, repulsion_sample=1000, max_positions=100_000):
+        self.size = size
+        # Beyond this many nodes, repulsion is estimated from a random sample of nodes per iteration
+        self.repulsion_sample = repulsion_sample
+        self.max_positions = max_positions
+        self.positions = OrderedDict()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def clear(self):
+        self.positions = OrderedDict()
+
+    def _initial_positions(self, np, pos, fixed, edge_idx):
+        """New nodes start next to the mean of their already placed neighbors or at random."""
+        n = len(pos)
+        rng = np.random.default_rng(n)
+        moving = ~fixed
+        pos[moving] = rng.uniform(-self.size / 2, self.size / 2, size=(int(moving.sum()), 2))
+        if not fixed.any() or not len(edge_idx):
+            return
+        neighbor_sum = np.zeros((n, 2))
+        neighbor_count = np.zeros(n)
+        for a, b in (edge_idx.T, edge_idx.T[::-1]):
+            known = fixed[b] & moving[a]
+            np.add.at(neighbor_sum, a[known], pos[b[known]])
+            np.add.at(neighbor_count, a[known], 1)
+        near = neighbor_count > 0
+        jitter = rng.normal(scale=self.size / 50, size=(int(near.sum()), 2))
+        pos[near] = neighbor_sum[near] / neighbor_count[near, None] + jitter
+
+    def layout(self, node_ids, edges, iterations=50):
+        """Return positions `{node_id: (x, y)}` for `node_ids`, `edges` are pairs of node ids.
+
+        Fruchterman-Reingold with vectorized repulsion in single precision, computed block-wise for the moving
+        nodes only and against a random sample of nodes for large graphs.
+        """
+        import numpy as np
+
+        ids = list(node_ids)
+        n = len(ids)
+        if not n:
+            return {}
+        index = {node_id: k for k, node_id in enumerate(ids)}
+        pairs = [(index[a], index[b]) for a, b in edges if a in index and b in index and a != b]
+        edge_idx = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+
+        pos = np.zeros((n, 2))
+        fixed = np.zeros(n, dtype=bool)
+        for k, node_id in enumerate(ids):
+            known = self.positions.get(node_id)
+            if known is not None:
+                pos[k] = known
+                fixed[k] = True
+        moving = np.flatnonzero(~fixed)
+
+        if len(moving):
+            self._initial_positions(np, pos, fixed, edge_idx)
+            k_dist = self.size / np.sqrt(n)
+            temperature = self.size / 10
+            cooling = temperature / (iterations + 1)
+            rng = np.random.default_rng(n)
+            sample_size = min(n, self.repulsion_sample)
+            block = max(1, _BLOCK_ELEMENTS // sample_size)
+            for _ in range(iterations):
+                disp = np.zeros((len(moving), 2))
+                others = np.arange(n) if sample_size == n else rng.choice(n, sample_size, replace=False)
+                x, y = pos[:, 0].astype(np.float32), pos[:, 1].astype(np.float32)
+                ox, oy = x[others], y[others]
+                scale = n / sample_size
+                for start in range(0, len(moving), block):
+                    rows = moving[start : start + block]
+                    dx = x[rows, None] - ox[None, :]
+                    dy = y[rows, None] - oy[None, :]
+                    strength = scale * k_dist**2 / (dx * dx + dy * dy + 1e-2)
+                    disp[start : start + block, 0] = (dx * strength).sum(axis=1)
+                    disp[start : start + block, 1] = (dy * strength).sum(axis=1)
+                if len(edge_idx):
+                    delta = pos[edge_idx[:, 0]] - pos[edge_idx[:, 1]]
+                    dist = np.sqrt(np.einsum("ij,ij->i", delta, delta)) + 1e-2
+                    force = delta * (dist / k_dist)[:, None]
+                    attraction = np.zeros((n, 2))
+                    np.add.at(attraction, edge_idx[:, 0], -force)
+                    np.add.at(attraction, edge_idx[:, 1], force)
+                    disp += attraction[moving]
+                length = np.sqrt(np.einsum("ij,ij->i", disp, disp)) + 1e-9
+                pos[moving] += disp * (np.minimum(length, temperature) / length)[:, None]
+                temperature -= cooling
+
+        for k in moving:
+            self.positions[ids[k]] = (float(pos[k, 0]), float(pos[k, 1]))
+        result = {}
+        for node_id in ids:
+            result[node_id] = self.positions[node_id]
+            self.positions.move_to_end(node_id)
+        while len(self.positions) > self.max_positions:
+            self.positions.popitem(last=False)
+        return result
@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import tempfile
+from contextlib import contextmanager
+
+
+# Counters of a result summary, which are reported when they are not zero
+SUMMARY_COUNTERS = [
+    "nodes_created",
+    "nodes_deleted",
+    "relationships_created",
+    "relationships_deleted",
+    "properties_set",
+    "labels_added",
+    "labels_removed",
+    "indexes_added",
+    "indexes_removed",
+    "constraints_added",
+    "constraints_removed",
+    "system_updates",
+]
+
+
+class CellMetrics:
+    """Timing breakdown in seconds, row and byte counts, and summary counters of one executed cell.
+
+    Kernel-side phases are `fetch` (waiting for records from the driver), `process` (splitting records into text,
+    nodes, and relationships), `render` (graph output), and `send` (iopub messages). The server's own times are
+    `server_available` and `server_consumed`, `pool_wait` is the connection acquisition and network time.
+    """
+
+    def __init__(self, execution_count, kind):
+        self.execution_count = execution_count
+        self.kind = kind
+        self.timings = {}
+        self.counters = {}
+        self.rows = 0
+        self.bytes = 0
+        self.status = "ok"
+        self.started = time.time()
+        self._started = time.perf_counter()
+
+    def add_time(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def timed(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - started)
+
+    def add_summary(self, summary):
+        if summary is None:
+            return
+        if summary.result_available_after is not None:
+            self.timings["server_available"] = summary.result_available_after / 1000
+        if summary.result_consumed_after is not None:
+            self.timings["server_consumed"] = summary.result_consumed_after / 1000
+        for name in SUMMARY_COUNTERS:
+            value = getattr(summary.counters, name, 0)
+            if value:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self):
+        self.timings["total"] = time.perf_counter() - self._started
+
+    def as_dict(self):
+        return {
+            "timestamp": self.started,
+            "execution_count": self.execution_count,
+            "kind": self.kind,
+            "status": self.status,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "timings": {phase: round(seconds, 6) for phase, seconds in self.timings.items()},
+            "counters": dict(self.counters),
+        }
+
+    def footer(self):
+        order = ["total", "pool_wait", "server_available", "server_consumed", "fetch", "process", "render", "send"]
+        parts = [f"{phase} {self.timings[phase] * 1000:.1f} ms" for phase in order if phase in self.timings]
+        parts.append(f"{self.rows} rows, {self.bytes} bytes")
+        parts.extend(f"{name.replace('_', ' ')} {value}" for name, value in self.counters.items())
+        return " | ".join(parts) + "\n"
+
+
+def _label_value(value):
+    # Label values of the text exposition format, the kind of a cell is typed by the user, e.g., `%%typo"`
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsExporter:
+    """Writes cell metrics to a local file for aggregation across users.
+
+    JSONL files get one line per cell appended. Prometheus text files, e.g., for the node exporter's textfile
+    collector, are rewritten atomically with cumulative counters and timing sums since the kernel started.
+    """
+
+    def __init__(self, path, format="jsonl"):
+        self.path = path
+        self.format = format
+        self._totals = {}
+
+    def export(self, metrics):
+        record = metrics.as_dict()
+        if self.format == "jsonl":
+            with open(os.path.expanduser(self.path), "a") as fp:
+                fp.write(json.dumps(record) + "\n")
+        else:
+            self._accumulate(record)
+            self._write_prometheus()
+
+    def _accumulate(self, record):
+        labels = (record["kind"], record["status"])
+        totals = self._totals.setdefault(labels, {"cells": 0, "rows": 0, "bytes": 0, "seconds": {}})
+        totals["cells"] += 1
+        totals["rows"] += record["rows"]
+        totals["bytes"] += record["bytes"]
+        for phase, seconds in record["timings"].items():
+            totals["seconds"][phase] = totals["seconds"].get(phase, 0.0) + seconds
+
+    def _write_prometheus(self):
+        lines = [
+            "# HELP cypher_kernel_cells_total Executed cells.",
+            "# TYPE cypher_kernel_cells_total counter",
+            "# HELP cypher_kernel_rows_total Consumed result rows.",
+            "# TYPE cypher_kernel_rows_total counter",
+            "# HELP cypher_kernel_bytes_total Approximate size of consumed values.",
+            "# TYPE cypher_kernel_bytes_total counter",
+            "# HELP cypher_kernel_phase_seconds_total Time spent per phase of cell execution.",
+            "# TYPE cypher_kernel_phase_seconds_total counter",
+        ]
+        for (kind, status), totals in sorted(self._totals.items()):
+            labels = f'kind="{_label_value(kind)}",status="{_label_value(status)}"'
+            lines.append(f"cypher_kernel_cells_total{{{labels}}} {totals['cells']}")
+            lines.append(f"cypher_kernel_rows_total{{{labels}}} {totals['rows']}")
+            lines.append(f"cypher_kernel_bytes_total{{{labels}}} {totals['bytes']}")
+            for phase, seconds in sorted(totals["seconds"].items()):
+                phase_labels = f'{labels},phase="{_label_value(phase)}"'
+                lines.append(f"cypher_kernel_phase_seconds_total{{{phase_labels}}} {seconds:.6f}")
+        path = os.path.expanduser(self.path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".cypher_kernel_metrics")
+        with os.fdopen(fd, "w") as fp:
+            fp.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
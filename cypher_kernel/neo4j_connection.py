@@ -1,34 +1,253 @@
 # This code does not come from me. It is adapted from CJ Sullivan's code:
 # https://gist.github.com/cj2001/30f993b482994c6908db04915115d688#file-neo4j_python_connection_class-py
 # https://towardsdatascience.com/create-a-graph-database-in-neo4j-using-python-4172d40f89c4
-from neo4j import GraphDatabase
+import time
+import warnings
+import threading
+from neo4j import ExperimentalWarning, GraphDatabase, Query
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
+
+# Transaction metadata key, which tags the transactions of the kernel, so that they can be found for termination
+TX_TAG_KEY = "cypher_kernel_tag"
 
 
 class Neo4jConnection:
-    def __init__(self, uri="neo4j://localhost:7687", user="neo4j", pwd="pwd"):
+    def __init__(
+        self,
+        uri="neo4j://localhost:7687",
+        user="neo4j",
+        pwd="pwd",
+        max_connection_pool_size=100,
+        connection_timeout=30.0,
+        max_connection_lifetime=3600,
+        liveness_check_timeout=60.0,
+    ):
         self.__uri = uri
         self.__user = user
         self.__pwd = pwd
+        self.__driver_config = {
+            "max_connection_pool_size": max_connection_pool_size,
+            "connection_timeout": connection_timeout,
+            "max_connection_lifetime": max_connection_lifetime,
+        }
+        self.liveness_check_timeout = liveness_check_timeout
         self.__driver = None
+        # Idle sessions per (database, fetch size, access mode), which are reused by subsequent queries
+        self.__idle_sessions = {}
+        # Queries run on a worker thread while the kernel may terminate them from the main thread
+        self.__lock = threading.Lock()
+        self.__last_used = 0.0
+        # Seconds the last query spent before the server started working on it, see `stream`
+        self.last_pool_wait = None
+        self._connect()
+
+    @property
+    def pool_size(self):
+        return self.__driver_config["max_connection_pool_size"]
+
+    @property
+    def idle_sessions(self):
+        return sum(len(sessions) for sessions in self.__idle_sessions.values())
+
+    def _connect(self):
         try:
-            self.__driver = GraphDatabase.driver(self.__uri, auth=(self.__user, self.__pwd))
+            self.__driver = GraphDatabase.driver(self.__uri, auth=(self.__user, self.__pwd), **self.__driver_config)
         except Exception as e:
             print("Failed to create the driver:", e)
 
     def close(self):
-        if self.__driver is not None:
-            self.__driver.close()
+        # Sessions of this driver, which are released later, are closed instead of pooled, see `_release_session`
+        with self.__lock:
+            driver, self.__driver = self.__driver, None
+            idle_sessions, self.__idle_sessions = self.__idle_sessions, {}
+        for sessions in idle_sessions.values():
+            for session in sessions:
+                session.close()
+        if driver is not None:
+            driver.close()
 
-    def query(self, query, parameters=None, db=None):
+    def reconnect(self):
+        """Throw away all sessions and the driver, e.g., after a database restart, and create a new driver."""
+        try:
+            self.close()
+        except Exception:
+            # The old driver may be broken beyond closing it properly
+            self.__driver = None
+        self._connect()
+
+    def _ensure_alive(self):
+        """Verify connectivity when the connection was idle for longer than `liveness_check_timeout` seconds."""
+        if self.__driver is None:
+            self._connect()
         assert self.__driver is not None, "Driver not initialized!"
-        session = None
-        response = None
+        idle_time = time.monotonic() - self.__last_used
+        if self.liveness_check_timeout is not None and idle_time > self.liveness_check_timeout:
+            try:
+                with warnings.catch_warnings():
+                    # The check is experimental in driver 4.4 and warns about it, which would end up in cell outputs
+                    warnings.simplefilter("ignore", ExperimentalWarning)
+                    self.__driver.verify_connectivity()
+            except (ServiceUnavailable, SessionExpired):
+                self.reconnect()
+
+    def _acquire_session(self, db, fetch_size, access_mode=None):
+        """Return an idle or a new session and the driver it belongs to, which is passed to `_release_session`."""
+        with self.__lock:
+            driver = self.__driver
+            idle = self.__idle_sessions.get((db, fetch_size, access_mode))
+            if idle:
+                return idle.pop(), driver
+        session_kwargs = {"fetch_size": fetch_size}
+        if db is not None:
+            session_kwargs["database"] = db
+        if access_mode is not None:
+            # A routing driver sends read sessions to the read replicas of a cluster
+            session_kwargs["default_access_mode"] = access_mode
+        return driver.session(**session_kwargs), driver
+
+    def _release_session(self, db, fetch_size, session, driver, access_mode=None):
+        with self.__lock:
+            if driver is self.__driver:
+                self.__idle_sessions.setdefault((db, fetch_size, access_mode), []).append(session)
+                return
+        # The connection reconnected while the session was checked out, e.g., by a suspended result of `%%more`
+        session.close()
+
+    def query(self, query, parameters=None, db=None):
+        return list(self.stream(query, parameters, db))
+
+    def terminate(self, tag, db=None):
+        """Terminate the server-side transactions tagged with `tag`, returns the ids of the terminated transactions."""
+        show_query = (
+            "SHOW TRANSACTIONS YIELD transactionId, metaData "
+            f"WHERE metaData.{TX_TAG_KEY} = $tag RETURN transactionId"
+        )
+        tx_ids = [record["transactionId"] for record in self.query(show_query, {"tag": tag}, db)]
+        if tx_ids:
+            self.query("TERMINATE TRANSACTIONS $tx_ids", {"tx_ids": tx_ids}, db)
+        return tx_ids
+
+    def summarize(self, query, parameters=None, db=None, tag=None, timeout=None):
+        """Run a query, discard its records on the server, and return the result summary, e.g., with its plan."""
+        records = self.stream(query, parameters, db, tag=tag, timeout=timeout, discard=True)
         try:
-            session = self.__driver.session(database=db) if db is not None else self.__driver.session()
-            response = list(session.run(query, parameters))
-        except Exception as e:
-            raise e
+            while True:
+                next(records)
+        except StopIteration as stop:
+            return stop.value
+
+    def begin(self, db=None, fetch_size=1000, tag=None, timeout=None):
+        """Begin an explicit transaction on a pooled session, which is tagged and timed out like in `stream`."""
+        self._ensure_alive()
+        for attempt in range(2):
+            session, driver = self._acquire_session(db, fetch_size)
+            try:
+                tx = session.begin_transaction(metadata={TX_TAG_KEY: tag} if tag else None, timeout=timeout)
+                return Transaction(self, session, driver, tx, db, fetch_size)
+            except (ServiceUnavailable, SessionExpired):
+                session.close()
+                if attempt:
+                    raise
+                self.reconnect()
+
+    def stream(
+        self,
+        query,
+        parameters=None,
+        db=None,
+        fetch_size=1000,
+        tag=None,
+        timeout=None,
+        discard=False,
+        access_mode=None,
+    ):
+        """Yield records one by one as the driver fetches them in batches of `fetch_size` from the server.
+
+        The session stays checked out while the generator is suspended, so a partially consumed result can be
+        continued later. Closing the generator early closes the session and discards the remaining records on the
+        server. A dead connection is replaced once by reconnecting before the query is given up.
+
+        The transaction carries `tag` in its metadata, so that `terminate` can find it, and the server aborts it
+        after `timeout` seconds.
+
+        When the generator is exhausted, it returns the result summary. With `discard`, no records are transferred.
+        With `access_mode`, e.g., `neo4j.READ_ACCESS`, the query runs in a session of that access mode.
+
+        `last_pool_wait` is the time `session.run` took minus the server's `result_available_after`, i.e., the time
+        spent on acquiring a pooled connection and on the network, which tells a slow network from a slow query.
+        """
+        self._ensure_alive()
+        tx_query = Query(query, metadata={TX_TAG_KEY: tag} if tag else None, timeout=timeout)
+        for attempt in range(2):
+            session, driver = self._acquire_session(db, fetch_size, access_mode)
+            try:
+                started = time.perf_counter()
+                result = session.run(tx_query, parameters)
+                run_time = time.perf_counter() - started
+                break
+            except (ServiceUnavailable, SessionExpired):
+                session.close()
+                if attempt:
+                    raise
+                self.reconnect()
+
+        completed = False
+        try:
+            if not discard:
+                for record in result:
+                    yield record
+            summary = result.consume()
+            server_time = (summary.result_available_after or 0) / 1000
+            self.last_pool_wait = max(run_time - server_time, 0.0)
+            completed = True
         finally:
-            if session is not None:
+            self.__last_used = time.monotonic()
+            if completed:
+                self._release_session(db, fetch_size, session, driver, access_mode)
+            else:
                 session.close()
-        return response
+        return summary
+
+
+class Transaction:
+    """An explicit transaction of a `Neo4jConnection`, in which several queries run before they are committed.
+
+    The session goes back to the pool after a commit. After a rollback, it is closed instead, as it may be broken.
+    """
+
+    def __init__(self, conn, session, driver, tx, db, fetch_size):
+        self.__conn = conn
+        self.__session = session
+        self.__driver = driver
+        self.__tx = tx
+        self.__db = db
+        self.__fetch_size = fetch_size
+
+    def stream(self, query, parameters=None):
+        """Yield the records of a query in the transaction and return its result summary, see `Neo4jConnection.stream`.
+
+        Closing the generator early discards the remaining records, so that the next query can run.
+        """
+        result = self.__tx.run(query, parameters)
+        try:
+            for record in result:
+                yield record
+        except GeneratorExit:
+            result.consume()
+            raise
+        return result.consume()
+
+    def commit(self):
+        try:
+            self.__tx.commit()
+        except Exception:
+            self.__session.close()
+            raise
+        self.__conn._release_session(self.__db, self.__fetch_size, self.__session, self.__driver)
+
+    def rollback(self):
+        try:
+            if not self.__tx.closed():
+                self.__tx.rollback()
+        finally:
+            self.__session.close()
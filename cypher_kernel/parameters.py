@@ -0,0 +1,46 @@
+import re
+import json
+from .cypher_text import mask_literals
+
+
+_PARAMETER = re.compile(r"\$(\w+)")
+_NAME = re.compile(r"^[A-Za-z_]\w*$")
+
+
+def parameter_names(query):
+    """Names of the `$parameters`, which a query uses outside of string literals and comments."""
+    return set(_PARAMETER.findall(mask_literals(query)))
+
+
+def parse_parameters(text):
+    """Parse the body of a `%%params` cell, a YAML mapping from parameter names to values."""
+    import yaml
+
+    try:
+        values = yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(f"%%params: invalid YAML: {e}") from None
+    if values is None:
+        return {}
+    if not isinstance(values, dict):
+        raise ValueError("%%params: expected a mapping of parameter names to values, e.g., `name: Tom Hanks`")
+    invalid = [str(name) for name in values if not isinstance(name, str) or not _NAME.match(name)]
+    if invalid:
+        raise ValueError(f"%%params: invalid parameter names: {', '.join(invalid)}")
+    return values
+
+
+class ParameterStore(dict):
+    """Parameters of the kernel session, which are passed to every Cypher query that uses them.
+
+    Values stay out of the query text, so that the server reuses cached plans when only the values change.
+    """
+
+    def for_query(self, query):
+        """The stored parameters used by `query`, so that unused values do not end up in cache keys."""
+        return {name: self[name] for name in parameter_names(query) if name in self}
+
+    def describe(self):
+        if not self:
+            return "No parameters set."
+        return "\n".join(f"${name}: {json.dumps(value, default=str)}" for name, value in sorted(self.items()))
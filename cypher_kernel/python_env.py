@@ -0,0 +1,163 @@
+import os
+import pickle
+import tempfile
+from array import array
+from neo4j.graph import Node, Path, Relationship
+
+
+# Runs once in the `%%python` helper, or in the kernel's own namespace with `python_mode: 'kernel'`. The loader
+# unpickles a handoff file written by `write_handoff` and rebinds `df`, `G`, `plan`, and optionally the adjacency
+# matrix `A` with its index maps, so that no result data passes through the pty as text. In the kernel, payloads are
+# applied without pickling. The dumper does the opposite for `%%params --python` and pickles variables as plain
+# values, which the driver accepts as query parameters.
+HELPER_SETUP = """import os
+import pickle
+import pandas as pd
+import networkx as nx
+G = nx.MultiDiGraph()
+df = pd.DataFrame()
+plan = None
+A, node_ids, node_index = None, None, {}
+def _cypher_kernel_adjacency(adjacency):
+    global A, node_ids, node_index
+    import numpy as np
+    try:
+        import scipy.sparse
+    except ImportError:
+        print("The adjacency matrix A requires SciPy")
+        return
+    nodes, starts, ends = (np.frombuffer(adjacency[k], dtype=np.int64) for k in ("nodes", "starts", "ends"))
+    node_ids = np.unique(np.concatenate([nodes, starts, ends]))
+    rows, cols = np.searchsorted(node_ids, starts), np.searchsorted(node_ids, ends)
+    n = len(node_ids)
+    A = scipy.sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+    node_index = dict(zip(node_ids.tolist(), range(n)))
+def _cypher_kernel_load(path):
+    try:
+        with open(path, "rb") as fp:
+            payload = pickle.load(fp)
+    finally:
+        os.remove(path)
+    _cypher_kernel_apply(payload)
+def _cypher_kernel_apply(payload):
+    global df, G, plan
+    if "data" in payload:
+        df = pd.DataFrame(payload["data"], columns=payload["columns"])
+    if "nodes" in payload:
+        G = nx.MultiDiGraph()
+        G.add_nodes_from(payload["nodes"])
+        G.add_edges_from(payload["edges"])
+    if "adjacency" in payload:
+        _cypher_kernel_adjacency(payload["adjacency"])
+    if "plan" in payload:
+        plan = payload["plan"]
+def _cypher_kernel_plain(value):
+    if isinstance(value, pd.DataFrame):
+        return [_cypher_kernel_plain(row) for row in value.to_dict("records")]
+    if isinstance(value, (pd.Series, pd.Index)) or (type(value).__module__ == "numpy" and hasattr(value, "tolist")):
+        return _cypher_kernel_plain(value.tolist())
+    if isinstance(value, (list, tuple, set)):
+        return [_cypher_kernel_plain(el) for el in value]
+    if isinstance(value, dict):
+        return {str(k): _cypher_kernel_plain(v) for k, v in value.items()}
+    return value
+def _cypher_kernel_dump(path, *names):
+    missing = [name for name in names if name not in globals()]
+    if missing:
+        print("Undefined variables: " + ", ".join(missing))
+        return
+    with open(path, "wb") as fp:
+        pickle.dump({name: _cypher_kernel_plain(globals()[name]) for name in names}, fp)
+"""
+
+
+def to_plain(value):
+    """Convert driver values into plain Python values, which unpickle without the Neo4j driver being installed."""
+    if isinstance(value, Node):
+        return {"_id": value.id, "_labels": sorted(value.labels), **value._properties}
+    if isinstance(value, Relationship):
+        start, end = value.nodes
+        return {"_id": value.id, "_type": value.type, "_start": start.id, "_end": end.id, **value._properties}
+    if isinstance(value, Path):
+        return [to_plain(el) for el in value]
+    if isinstance(value, (list, tuple)):
+        return [to_plain(el) for el in value]
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in value.items()}
+    if hasattr(value, "to_native"):
+        # Neo4j temporal types
+        return value.to_native()
+    return value
+
+
+class ResultColumns:
+    """Plain values of records in one list per column, which are collected batch-wise instead of the records."""
+
+    def __init__(self):
+        self.columns = []
+        self.data = {}
+
+    def extend(self, records):
+        if not records:
+            return
+        if not self.columns:
+            self.columns = list(records[0].keys())
+            self.data = {key: [] for key in self.columns}
+        appenders = [self.data[key].append for key in self.columns]
+        for record in records:
+            for append, value in zip(appenders, record.values()):
+                append(to_plain(value))
+
+
+def result_to_columns(records):
+    """Transpose records into one list of plain values per column."""
+    if not isinstance(records, ResultColumns):
+        records, collected = ResultColumns(), records
+        records.extend(collected)
+    return records.columns, records.data
+
+
+def graph_to_lists(nodes, relations):
+    """Node and edge lists in the shape of `add_nodes_from` and `add_edges_from` of a networkx `MultiDiGraph`."""
+    node_list = [(n.id, {**to_plain(n._properties), "labels": sorted(n.labels)}) for n in nodes]
+    edge_list = [
+        (r.nodes[0].id, r.nodes[1].id, r.id, {**to_plain(r._properties), "type": r.type}) for r in relations
+    ]
+    return node_list, edge_list
+
+
+def adjacency_arrays(nodes, relations):
+    """Node ids and relationship endpoints as raw int64 buffers, from which the helper builds a CSR matrix without
+    a Python loop per relationship.
+    """
+    return {
+        "nodes": array("q", [n.id for n in nodes]).tobytes(),
+        "starts": array("q", [r.nodes[0].id for r in relations]).tobytes(),
+        "ends": array("q", [r.nodes[1].id for r in relations]).tobytes(),
+    }
+
+
+def result_payload(records, nodes, relations, adjacency=False):
+    columns, data = result_to_columns(records)
+    node_list, edge_list = graph_to_lists(nodes, relations)
+    payload = {"columns": columns, "data": data, "nodes": node_list, "edges": edge_list}
+    if adjacency:
+        payload["adjacency"] = adjacency_arrays(nodes, relations)
+    return payload
+
+
+def read_handoff(path):
+    """Unpickle and remove a file written by `_cypher_kernel_dump` in the `%%python` helper."""
+    try:
+        with open(path, "rb") as fp:
+            return pickle.load(fp)
+    finally:
+        os.remove(path)
+
+
+def write_handoff(payload):
+    """Pickle a payload into a temporary file for the `%%python` helper and return the path of that file."""
+    fd, path = tempfile.mkstemp(prefix="cypher_kernel_", suffix=".pickle")
+    with os.fdopen(fd, "wb") as fp:
+        pickle.dump(payload, fp, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
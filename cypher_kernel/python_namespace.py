@@ -0,0 +1,144 @@
+import io
+import ast
+import sys
+import base64
+import builtins
+import linecache
+import traceback
+import contextlib
+from .helper_stream import BoundedOutput
+from .python_env import HELPER_SETUP
+
+
+class _StreamWriter(io.TextIOBase):
+    """`sys.stdout` or `sys.stderr` while a cell runs, which forwards what is written as the cell's stream output."""
+
+    def __init__(self, output):
+        self.output = output
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.output.add(text)
+        return len(text)
+
+    def flush(self):
+        self.output.flush()
+
+
+_formatter = None
+
+
+def mime_bundle(obj):
+    """The rich representations of an object, e.g., HTML and plain text for a DataFrame, as Jupyter renders them."""
+    global _formatter
+    if _formatter is None:
+        from IPython.core.formatters import DisplayFormatter
+
+        _formatter = DisplayFormatter()
+    data, _ = _formatter.format(obj)
+    return data
+
+
+def _figure_bundle(figure):
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", bbox_inches="tight")
+    return {"image/png": base64.b64encode(buffer.getvalue()).decode("ascii"), "text/plain": repr(figure)}
+
+
+def _exit(code=None):
+    """`exit()` and `quit()` in cells, which unlike the builtins of `site` do not close the kernel's stdin."""
+    raise SystemExit(code)
+
+
+class PythonNamespace:
+    """The globals of `%%python` cells with `python_mode: 'kernel'`, which run in the kernel process itself.
+
+    The latest result is bound as objects: `records` holds the driver's records, and `df`, `G`, `plan`, and `A` are
+    built like in the helper process, but without pickling them or passing text through a pty. The value of a
+    trailing expression and objects passed to `display` are sent with their rich representations, and open
+    matplotlib figures are shown as PNG images after each cell.
+    """
+
+    def __init__(self):
+        self.globals = {"__name__": "__main__", "__builtins__": builtins, "exit": _exit, "quit": _exit}
+        exec(HELPER_SETUP, self.globals)
+        self.globals["records"] = []
+        self._cells = 0
+
+    def load(self, payload, records=None):
+        """Bind a payload of `result_payload`, and the records it was built from, to the namespace."""
+        self.globals["_cypher_kernel_apply"](payload)
+        if records is not None:
+            self.globals["records"] = records
+
+    def values(self, names):
+        """Plain values of variables, e.g., for `%%params --python`."""
+        missing = [name for name in names if name not in self.globals]
+        if missing:
+            raise ValueError("Undefined variables: " + ", ".join(missing))
+        plain = self.globals["_cypher_kernel_plain"]
+        return {name: plain(self.globals[name]) for name in names}
+
+    def run(self, code, stream, display, max_bytes=None):
+        """Run the code of a cell and return the number of discarded output bytes beyond `max_bytes`.
+
+        `stream(name, text)` receives stdout and stderr while the cell runs, and `display(data)` receives the mime
+        bundles of displayed objects. Exceptions of the code, incl. `SystemExit`, are printed to stderr and re-raised.
+        """
+        self._cells += 1
+        filename = f"<cell-{self._cells}>"
+        # Tracebacks show the lines of the cell
+        linecache.cache[filename] = (len(code), None, code.splitlines(True), filename)
+        stdout = BoundedOutput(lambda text: stream("stdout", text), max_bytes)
+        stderr = BoundedOutput(lambda text: stream("stderr", text), max_bytes)
+
+        def show(*objs):
+            stdout.flush()
+            for obj in objs:
+                display(mime_bundle(obj))
+
+        self.globals["display"] = show
+        try:
+            with contextlib.redirect_stdout(_StreamWriter(stdout)), contextlib.redirect_stderr(_StreamWriter(stderr)):
+                try:
+                    self._exec(code, filename, show)
+                    self._show_figures(display, stdout)
+                except SystemExit as e:
+                    # Like in IPython, leaving the cell must not leave the kernel
+                    sys.stderr.write(f"The cell exited with SystemExit: {e.code}\n")
+                    raise
+                except BaseException as e:
+                    tb = e.__traceback__
+                    # Frames of this module are not part of the user's traceback
+                    while tb is not None and tb.tb_frame.f_code.co_filename == __file__:
+                        tb = tb.tb_next
+                    sys.stderr.write("".join(traceback.format_exception(type(e), e, tb)))
+                    raise
+        finally:
+            stdout.flush()
+            stderr.flush()
+        return stdout.discarded + stderr.discarded
+
+    def _exec(self, code, filename, show):
+        tree = ast.parse(code, filename)
+        last = tree.body.pop() if tree.body and isinstance(tree.body[-1], ast.Expr) else None
+        exec(compile(tree, filename, "exec"), self.globals)
+        if last is not None:
+            value = eval(compile(ast.Expression(last.value), filename, "eval"), self.globals)
+            if value is not None:
+                self.globals["_"] = value
+                show(value)
+
+    @staticmethod
+    def _show_figures(display, stdout):
+        # Like IPython's inline backend, figures are shown once and closed
+        pyplot = sys.modules.get("matplotlib.pyplot")
+        if pyplot is None:
+            return
+        stdout.flush()
+        for number in pyplot.get_fignums():
+            display(_figure_bundle(pyplot.figure(number)))
+        pyplot.close("all")
+
@@ -0,0 +1,101 @@
+import html
+
+
+# Key in the rows of `plan_rows`, column title, and whether only profiles have the value
+PLAN_COLUMNS = [
+    ("operator", "Operator", False),
+    ("details", "Details", False),
+    ("estimated_rows", "Estimated Rows", False),
+    ("rows", "Rows", True),
+    ("db_hits", "DB Hits", True),
+    ("page_cache_hits", "Page Cache Hits", True),
+    ("page_cache_misses", "Page Cache Misses", True),
+    ("time_ms", "Time (ms)", True),
+]
+# Number of operators, which are highlighted as most expensive
+HIGHLIGHTED = 3
+
+
+def _operator_row(plan, depth):
+    args = plan.get("args") or plan.get("arguments") or {}
+    estimated_rows = args.get("EstimatedRows")
+    time_ns = plan.get("time")
+    return {
+        "depth": depth,
+        "operator": plan.get("operatorType", "").split("@")[0],
+        "details": args.get("Details") or ", ".join(sorted(plan.get("identifiers", []))),
+        "estimated_rows": round(estimated_rows) if estimated_rows is not None else None,
+        "rows": plan.get("rows"),
+        "db_hits": plan.get("dbHits"),
+        "page_cache_hits": plan.get("pageCacheHits"),
+        "page_cache_misses": plan.get("pageCacheMisses"),
+        # The server reports operator times in nanoseconds
+        "time_ms": round(time_ns / 1e6, 3) if time_ns is not None else None,
+    }
+
+
+def plan_rows(plan, depth=0):
+    """Flatten a plan or profile of a result summary into one row per operator, depth-first from the root."""
+    rows = [_operator_row(plan, depth)]
+    for child in plan.get("children", []):
+        rows.extend(plan_rows(child, depth + 1))
+    return rows
+
+
+def structured_plan(plan):
+    """The plan as a tree of plain dictionaries, e.g., for inspection in `%%python` cells."""
+    node = _operator_row(plan, 0)
+    del node["depth"]
+    node["children"] = [structured_plan(child) for child in plan.get("children", [])]
+    return node
+
+
+def most_expensive(rows, profiled):
+    """Indexes of the operators with most DB hits in a profile or most estimated rows in a plan."""
+    key = "db_hits" if profiled else "estimated_rows"
+    ranked = sorted((i for i, row in enumerate(rows) if row[key]), key=lambda i: rows[i][key], reverse=True)
+    return set(ranked[:HIGHLIGHTED])
+
+
+def _columns(profiled):
+    return [(key, title) for key, title, profile_only in PLAN_COLUMNS if profiled or not profile_only]
+
+
+def _cell(row, key):
+    value = row[key]
+    if key == "operator":
+        return "  " * row["depth"] + "+" + value
+    return "" if value is None else str(value)
+
+
+def render_plan_text(rows, profiled):
+    columns = _columns(profiled)
+    expensive = most_expensive(rows, profiled)
+    table = [[title for _, title in columns]] + [[_cell(row, key) for key, _ in columns] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    lines = []
+    for idx, line in enumerate(table):
+        marker = "*" if idx - 1 in expensive else " "
+        lines.append(marker + " | ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip())
+        if idx == 0:
+            lines.append(" " + "-+-".join("-" * width for width in widths))
+    lines.append("")
+    lines.append(f"* most {'DB hits' if profiled else 'estimated rows'}")
+    return "\n".join(lines) + "\n"
+
+
+def render_plan_html(rows, profiled):
+    columns = _columns(profiled)
+    expensive = most_expensive(rows, profiled)
+    header = "".join(f"<th>{html.escape(title)}</th>" for _, title in columns)
+    body = []
+    for idx, row in enumerate(rows):
+        style = ' style="background-color: rgba(255, 99, 71, 0.3)"' if idx in expensive else ""
+        cells = []
+        for key, _ in columns:
+            value = html.escape(_cell(row, key).lstrip())
+            if key == "operator":
+                value = f'<span style="padding-left: {row["depth"]}em">{value}</span>'
+            cells.append(f'<td style="text-align: left">{value}</td>')
+        body.append(f"<tr{style}>{''.join(cells)}</tr>")
+    return f"<table><thead><tr>{header}</tr></thead><tbody>{''.join(body)}</tbody></table>"
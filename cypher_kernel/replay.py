@@ -0,0 +1,122 @@
+"""Replay a workload captured with `workload_file` against a database and compare the latencies with the recording.
+
+    python -m cypher_kernel.replay workload.jsonl --uri neo4j://localhost:7687 --concurrency 4
+
+The latency of a cell is the time from sending its statements until the recorded number of rows is fetched, which
+corresponds to the `fetch` time of the recording. Cells that write are skipped unless `--include-writes` is given.
+"""
+import math
+import time
+import argparse
+import concurrent.futures
+from .result_cache import is_write_query
+from .statements import split_statements
+from .workload import read_workload
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of `values`."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = math.ceil(p / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def baseline_latency(entry):
+    timings = entry.get("timings", {})
+    return timings.get("fetch", timings.get("total"))
+
+
+def replay_entry(conn, entry, fetch_size=1000):
+    """Run the statements of a cell one after another and return the seconds until its rows are fetched."""
+    remaining = entry.get("rows")
+    started = time.perf_counter()
+    for statement in split_statements(entry["query"]):
+        records = conn.stream(statement, entry.get("parameters") or None, db=entry.get("db"), fetch_size=fetch_size)
+        try:
+            for _ in records:
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining <= 0:
+                        break
+        finally:
+            records.close()
+    return time.perf_counter() - started
+
+
+def replay(conn, entries, concurrency=1, repeat=1):
+    """Return the replayed latency per entry, the minimum over `repeat` runs, or the error message of a failure."""
+
+    def run(entry):
+        try:
+            return min(replay_entry(conn, entry) for _ in range(repeat))
+        except Exception as e:
+            return getattr(e, "message", None) or str(e)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(run, entries))
+
+
+def _ms(seconds):
+    return "n/a" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+
+def report(entries, latencies, top=5):
+    pairs = [
+        (entry, baseline_latency(entry), latency)
+        for entry, latency in zip(entries, latencies)
+        if isinstance(latency, float) and baseline_latency(entry) is not None
+    ]
+    errors = [(entry, latency) for entry, latency in zip(entries, latencies) if isinstance(latency, str)]
+    baseline = [b for _, b, _ in pairs]
+    replayed = [r for _, _, r in pairs]
+    lines = [f"Replayed {len(pairs)} of {len(entries)} queries", ""]
+    lines.append(f"{'':6}{'baseline':>14}{'replay':>14}{'diff':>10}")
+    for p in PERCENTILES:
+        before, after = percentile(baseline, p), percentile(replayed, p)
+        diff = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        lines.append(f"{'p' + str(p):6}{_ms(before):>14}{_ms(after):>14}{diff:>10}")
+    slower = sorted(pairs, key=lambda pair: pair[2] - pair[1], reverse=True)[:top]
+    if slower:
+        lines.extend(["", "Largest slowdowns:"])
+        for entry, before, after in slower:
+            lines.append(f"  {_ms(before)} -> {_ms(after)}  {entry['query'][:80]}")
+    if errors:
+        lines.extend(["", f"{len(errors)} queries failed:"])
+        lines.extend(f"  {message[:100]}  {entry['query'][:80]}" for entry, message in errors)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from .config import ConfigLoader
+
+    cfg = ConfigLoader().get()
+    ap = argparse.ArgumentParser(prog="python -m cypher_kernel.replay", description=__doc__.splitlines()[0])
+    ap.add_argument("workload", help="JSONL file written by the kernel with `workload_file`")
+    ap.add_argument("--uri", default=cfg.host, help="Database to replay against, default from cypher_config.yml")
+    ap.add_argument("--user", default=cfg.user)
+    ap.add_argument("--password", default=cfg.pwd)
+    ap.add_argument("--concurrency", type=int, default=1, help="Number of queries replayed at the same time")
+    ap.add_argument("--repeat", type=int, default=1, help="Runs per query, the fastest one counts")
+    ap.add_argument("--include-writes", action="store_true", help="Also replay cells that write, TAKE CARE!")
+    args = ap.parse_args(argv)
+
+    entries = [entry for entry in read_workload(args.workload) if entry.get("status", "ok") == "ok"]
+    if not args.include_writes:
+        entries = [entry for entry in entries if not is_write_query(entry["query"])]
+
+    from .neo4j_connection import Neo4jConnection
+
+    conn = Neo4jConnection(uri=args.uri, user=args.user, pwd=args.password, max_connection_pool_size=args.concurrency)
+    try:
+        latencies = replay(conn, entries, concurrency=max(args.concurrency, 1), repeat=max(args.repeat, 1))
+    finally:
+        conn.close()
+    print(report(entries, latencies))
+
+
+if __name__ == "__main__":
+    main()
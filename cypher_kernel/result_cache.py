@@ -0,0 +1,99 @@
+import re
+import json
+from collections import OrderedDict
+from .cypher_text import mask_literals, normalize_query
+
+
+_WRITE_CLAUSES = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE|DROP|FOREACH|LOAD\s+CSV|GRANT|REVOKE|DENY)\b", re.I)
+_VOLATILE = re.compile(r"\b(rand|randomUUID|timestamp|datetime|date|time|localdatetime|localtime)\s*\(|\bSHOW\b", re.I)
+_PROCEDURE_CALL = re.compile(r"\bCALL\s+([\w.]+)\s*\(", re.I)
+# Procedures, which are known to only read, calling anything else invalidates the cache
+READ_ONLY_PROCEDURES = (
+    "db.labels",
+    "db.relationshipTypes",
+    "db.propertyKeys",
+    "db.schema.",
+    "db.indexes",
+    "db.constraints",
+    "dbms.components",
+    "dbms.procedures",
+    "dbms.functions",
+    "apoc.meta.",
+)
+
+
+def is_write_query(query):
+    structure = mask_literals(query)
+    if _WRITE_CLAUSES.search(structure):
+        return True
+    procedures = _PROCEDURE_CALL.findall(structure)
+    return any(not p.startswith(READ_ONLY_PROCEDURES) for p in procedures)
+
+
+def is_cacheable(query):
+    """Only deterministic read queries are cached."""
+    return not is_write_query(query) and not _VOLATILE.search(mask_literals(query))
+
+
+class ResultCache:
+    """LRU cache of query results, bounded by the number of entries and by the approximate size of the values."""
+
+    def __init__(self, max_entries=128, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(query, parameters=None, db=None):
+        return normalize_query(query), json.dumps(parameters or {}, sort_keys=True, default=str), db
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, records, size):
+        if size > self.max_bytes or self.max_entries < 1:
+            return
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        self._entries[key] = (records, size)
+        self.size += size
+        self._evict()
+
+    def resize(self, max_entries, max_bytes):
+        self.max_entries, self.max_bytes = max_entries, max_bytes
+        self._evict()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return "\n".join(
+            [
+                f"Entries: {len(self._entries)}/{self.max_entries}",
+                f"Size: {self.size}/{self.max_bytes} bytes",
+                f"Hits: {self.hits}, misses: {self.misses}, hit rate: {hit_rate:.1%}",
+                f"Evictions: {self.evictions}",
+            ]
+        )
@@ -0,0 +1,129 @@
+import re
+import time
+import threading
+from bisect import bisect_left
+
+
+class PrefixIndex:
+    """Sorted, duplicate-free words, which are looked up case-insensitively by prefix with a binary search."""
+
+    def __init__(self, words=()):
+        self._entries = sorted({(w.lower(), w) for w in words})
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return (word for _, word in self._entries)
+
+    def lookup(self, prefix):
+        prefix = prefix.lower()
+        matches = []
+        for lowered, word in self._entries[bisect_left(self._entries, (prefix,)) :]:
+            if not lowered.startswith(prefix):
+                break
+            matches.append(word)
+        return matches
+
+
+class SchemaSnapshot:
+    def __init__(self, labels=(), relationship_types=(), property_keys=(), procedures=()):
+        self.labels = PrefixIndex(labels)
+        self.relationship_types = PrefixIndex(relationship_types)
+        self.property_keys = PrefixIndex(property_keys)
+        self.procedures = PrefixIndex(procedures)
+        self.fetched_at = time.monotonic()
+
+
+class SchemaCache:
+    """Schema snapshot of the database, which is refreshed in the background.
+
+    Lookups never wait for the database: they see the latest snapshot, which is empty until the first refresh
+    finished. A refresh starts when the snapshot is older than `ttl` seconds or was invalidated after a write.
+    """
+
+    def __init__(self, conn, ttl=300.0, log=None):
+        self.conn = conn
+        self.ttl = ttl
+        self.log = log
+        self.snapshot = SchemaSnapshot()
+        self._stale = True
+        self._refreshing = threading.Lock()
+
+    def invalidate(self):
+        self._stale = True
+
+    def _fetch(self):
+        def names(query, key):
+            return [record[key] for record in self.conn.query(query)]
+
+        labels = names("CALL db.labels() YIELD label RETURN label", "label")
+        rel_types = names("CALL db.relationshipTypes() YIELD relationshipType AS type RETURN type", "type")
+        property_keys = names("CALL db.propertyKeys() YIELD propertyKey RETURN propertyKey", "propertyKey")
+        try:
+            procedures = names("SHOW PROCEDURES YIELD name RETURN name", "name")
+        except Exception:
+            # Before Neo4j 4.3
+            procedures = names("CALL dbms.procedures() YIELD name RETURN name", "name")
+        return SchemaSnapshot(labels, rel_types, property_keys, procedures)
+
+    def _refresh(self):
+        try:
+            self._stale = False
+            self.snapshot = self._fetch()
+        except Exception as e:
+            self._stale = True
+            if self.log is not None:
+                self.log.warning("Could not fetch the schema for completion: %s", e)
+        finally:
+            self._refreshing.release()
+
+    def maybe_refresh(self):
+        expired = self.ttl is not None and time.monotonic() - self.snapshot.fetched_at > self.ttl
+        if (self._stale or expired) and self._refreshing.acquire(blocking=False):
+            threading.Thread(target=self._refresh, daemon=True).start()
+
+
+_WORD_BEFORE = re.compile(r"(\w+)\s*$")
+
+
+def _enclosing_bracket(code):
+    """The innermost bracket, which is still open at the end of `code`."""
+    depth = {"(": 0, "[": 0, "{": 0}
+    closing = {")": "(", "]": "[", "}": "{"}
+    for char in reversed(code):
+        if char in closing:
+            depth[closing[char]] += 1
+        elif char in depth:
+            if depth[char] == 0:
+                return char
+            depth[char] -= 1
+    return None
+
+
+def complete(code, cursor_pos, snapshot, keywords, parameters=()):
+    """Completion candidates for the token before the cursor and the position, where that token starts.
+
+    Labels follow a `:` in a node pattern, relationship types follow a `:` or `|` in a relationship pattern,
+    property keys follow a `.`, procedures follow `CALL`, and parameters follow `$`. Otherwise, keywords match.
+    """
+    before = code[:cursor_pos]
+    start = cursor_pos
+    while start > 0 and (before[start - 1].isalnum() or before[start - 1] in "_."):
+        start -= 1
+    token = before[start:]
+    preceding = before[start - 1] if start > 0 else ""
+
+    if preceding == "$":
+        return PrefixIndex(parameters).lookup(token), start
+    word_before = _WORD_BEFORE.search(before[:start])
+    if word_before and word_before.group(1).upper() == "CALL":
+        return snapshot.procedures.lookup(token), start
+    if "." in token:
+        dot = start + token.rindex(".") + 1
+        return snapshot.property_keys.lookup(before[dot:]), dot
+    if preceding in ":|":
+        if _enclosing_bracket(before[:start]) == "[":
+            return snapshot.relationship_types.lookup(token), start
+        return snapshot.labels.lookup(token), start
+    return keywords.lookup(token), start
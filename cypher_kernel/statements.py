@@ -0,0 +1,26 @@
+import re
+from .cypher_text import mask_literals
+
+
+# Statements, which manage their own transactions and cannot run inside of an explicit one
+_IMPLICIT_ONLY = re.compile(r"\bIN\s+TRANSACTIONS\b|\bUSING\s+PERIODIC\s+COMMIT\b", re.I)
+
+
+def split_statements(code):
+    """Split a cell into its statements at semicolons, which are not part of string literals, quoted identifiers, or
+    comments. Statements without any Cypher, e.g., only comments, are dropped.
+    """
+    # Masking keeps the length of the code, so that positions in the masked code are positions in the cell
+    structure = mask_literals(code, keep_length=True)
+    statements, start = [], 0
+    for pos, char in enumerate(structure):
+        if char == ";":
+            statements.append((code[start:pos], structure[start:pos]))
+            start = pos + 1
+    statements.append((code[start:], structure[start:]))
+    return [statement.strip() for statement, masked in statements if masked.strip()]
+
+
+def needs_autocommit(statement):
+    """`CALL {...} IN TRANSACTIONS` and `USING PERIODIC COMMIT` are only allowed in auto-commit transactions."""
+    return bool(_IMPLICIT_ONLY.search(mask_literals(statement)))
@@ -0,0 +1,93 @@
+import html
+import json
+from neo4j.graph import Node, Path, Relationship
+
+
+def _format_nested(value):
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    return format_value(value)
+
+
+def format_value(value):
+    """A compact Cypher-like text of a value, e.g., `(:Person {name: "Alice"})` for a node."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, Node):
+        labels = "".join(f":{label}" for label in sorted(value.labels))
+        return f"({labels} {format_value(value._properties)})" if value._properties else f"({labels})"
+    if isinstance(value, Relationship):
+        return f"[:{value.type} {format_value(value._properties)}]" if value._properties else f"[:{value.type}]"
+    if isinstance(value, Path):
+        nodes = value.nodes
+        parts = [format_value(nodes[0])]
+        for relationship, previous, node in zip(value.relationships, nodes, nodes[1:]):
+            rel = format_value(relationship)
+            parts.append(f"-{rel}->" if relationship.start_node.id == previous.id else f"<-{rel}-")
+            parts.append(format_value(node))
+        return "".join(parts)
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_format_nested(el) for el in value) + "]"
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{k}: {_format_nested(v)}" for k, v in value.items()) + "}"
+    return str(value)
+
+
+class ResultTable:
+    """Column buffers of the first `max_rows` rows of a result, which render as a text or an HTML table.
+
+    Cells are formatted and truncated to `max_width` characters when they are added. Rows beyond the displayed
+    window are only counted, so a result of any size takes linear time and no memory beyond the window.
+    """
+
+    def __init__(self, columns, max_rows=100, max_width=60):
+        self.columns = [str(column) for column in columns]
+        self.max_rows = max_rows
+        self.max_width = max_width
+        self._cells = [[] for _ in self.columns]
+        self.rows = 0
+        # Results of only nodes and relationships are shown as graph, not as table
+        self.has_values = False
+
+    def _truncate(self, text):
+        text = text.replace("\n", " ")
+        if self.max_width is not None and len(text) > self.max_width:
+            return text[: max(self.max_width - 1, 0)] + "…"
+        return text
+
+    def add(self, values, has_values=True):
+        self.rows += 1
+        self.has_values = self.has_values or has_values
+        if self.max_rows is None or self.rows <= self.max_rows:
+            for cells, value in zip(self._cells, values):
+                cells.append(self._truncate(format_value(value)))
+
+    @property
+    def shown_rows(self):
+        return len(self._cells[0]) if self._cells else 0
+
+    def footer(self):
+        hidden = self.rows - self.shown_rows
+        return f"{hidden:,} more rows" if hidden else ""
+
+    def render_text(self):
+        headers = [self._truncate(column) for column in self.columns]
+        widths = [max([len(header)] + [len(cell) for cell in cells]) for header, cells in zip(headers, self._cells)]
+        lines = [" | ".join(h.ljust(w) for h, w in zip(headers, widths)).rstrip()]
+        lines.append("-+-".join("-" * w for w in widths))
+        lines.extend(" | ".join(c.ljust(w) for c, w in zip(row, widths)).rstrip() for row in zip(*self._cells))
+        if self.footer():
+            lines.append(self.footer())
+        return "\n".join(lines)
+
+    def render_html(self):
+        head = "".join(f"<th>{html.escape(self._truncate(column))}</th>" for column in self.columns)
+        body = "".join(
+            "<tr>" + "".join(f"<td>{html.escape(cell)}</td>" for cell in row) + "</tr>" for row in zip(*self._cells)
+        )
+        table = f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+        if self.footer():
+            table += f"<p>{self.footer()}</p>"
+        return table
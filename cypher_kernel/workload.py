@@ -0,0 +1,30 @@
+import os
+import json
+from .cypher_text import normalize_query
+
+
+def workload_entry(query, parameters, db, metrics):
+    """One line of a workload file: a Cypher cell as it ran against the database, with its metrics."""
+    record = metrics.as_dict()
+    return {
+        "timestamp": record["timestamp"],
+        "query": normalize_query(query),
+        "parameters": parameters,
+        "db": db,
+        "status": record["status"],
+        "rows": record["rows"],
+        "bytes": record["bytes"],
+        "timings": record["timings"],
+        "counters": record["counters"],
+    }
+
+
+def append_entry(path, entry):
+    with open(os.path.expanduser(path), "a") as fp:
+        # Parameters, which JSON cannot represent, e.g., temporal values, are captured as strings
+        fp.write(json.dumps(entry, default=str) + "\n")
+
+
+def read_workload(path):
+    with open(os.path.expanduser(path)) as fp:
+        return [json.loads(line) for line in fp if line.strip()]
@@ -5,6 +5,7 @@ setup(
     name="cypher_kernel",
     version="0.3.2",
     packages=["cypher_kernel"],
+    package_data={"cypher_kernel": ["resources/*"]},
     description="A Cypher kernel for Jupyter",
     long_description="""Cypher Kernel
 =============
@@ -61,7 +62,7 @@ an ``Cypher`` notebook.
     author="HelgeCPH",
     author_email="ropf@itu.dk",
     url="https://github.com/HelgeCPH/cypher_kernel",
-    install_requires=["jupyter_client==5.2.2", "IPython", "ipykernel", "requests", "jinja2", "pyyaml", "neo4j"],
+    install_requires=["jupyter_client==5.2.2", "IPython", "ipykernel", "requests", "pyyaml", "neo4j"],
     include_package_data=True,
     classifiers=[
         "Development Status :: 3 - Alpha",
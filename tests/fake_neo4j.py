@@ -0,0 +1,290 @@
+""" A stand-in for `Neo4jConnection`, which serves synthetic records instead of talking to a database.
+
+Records are made of real driver `Node`, `Relationship`, and scalar values, so that the kernel takes the same code
+paths as with a database. They are generated lazily, so that a result of 10^6 records is never held in memory by the
+fake itself.
+"""
+
+import warnings
+from types import SimpleNamespace
+from jupyter_client.session import Session
+from neo4j import ExperimentalWarning, Record
+from neo4j.exceptions import ServiceUnavailable
+from neo4j.graph import Graph
+
+
+SHAPES = ("scalar", "node", "triple")
+
+
+def synthetic_records(count, shape="triple", labels=3, properties=3, value_size=16, distinct_nodes=None):
+    """Yield `count` records of a shape:
+
+    * `scalar`: an integer, a float, and a string of `value_size` characters
+    * `node`: one node
+    * `triple`: a node, a relationship, and another node as in `MATCH (n)-[r]->(m) RETURN n, r, m`
+
+    Nodes carry one of `labels` labels and `properties` string properties of `value_size` characters. With
+    `distinct_nodes`, node ids repeat after that many nodes, like in results that return the same nodes again.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape {shape}, use one of {', '.join(SHAPES)}")
+    hydrator = Graph.Hydrator(Graph())
+    distinct_nodes = distinct_nodes or 2 * count or 1
+    padding = "x" * value_size
+
+    def node(node_id):
+        node_id %= distinct_nodes
+        props = {f"p{k}": f"{node_id}{padding}"[:value_size] for k in range(properties)}
+        return hydrator.hydrate_node(node_id, [f"Label{node_id % labels}"], props)
+
+    for k in range(count):
+        if shape == "scalar":
+            yield Record(zip(["i", "f", "s"], [k, k / 3, f"{k}{padding}"[:value_size]]))
+        elif shape == "node":
+            yield Record(zip(["n"], [node(k)]))
+        else:
+            start, end = node(2 * k), node(2 * k + 1)
+            rel = hydrator.hydrate_relationship(k, start.id, end.id, f"TYPE{k % labels}", {"weight": k % 7})
+            yield Record(zip(["n", "r", "m"], [start, rel, end]))
+
+
+def fake_node(id, labels=("Person",), properties=None):
+    """A driver `Node`, e.g., `fake_node(1, ["Person"], {"name": "Alice"})`."""
+    return Graph.Hydrator(Graph()).hydrate_node(id, list(labels), properties or {})
+
+
+def fake_relationship(id, start, end, type="KNOWS", properties=None):
+    """A driver `Relationship` from node `start` to node `end`, which belongs to the graph of `start`."""
+    hydrator = Graph.Hydrator(start.graph)
+    hydrator.hydrate_node(end.id, list(end.labels), dict(end._properties))
+    return hydrator.hydrate_relationship(id, start.id, end.id, type, properties or {})
+
+
+def fake_summary(plan=None, profile=None):
+    return SimpleNamespace(
+        result_available_after=1,
+        result_consumed_after=2,
+        counters=SimpleNamespace(),
+        plan=plan,
+        profile=profile,
+    )
+
+
+class FakeTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def stream(self, query, parameters=None):
+        return self.conn.stream(query, parameters)
+
+    def commit(self):
+        self.conn.commits += 1
+
+    def rollback(self):
+        self.conn.rollbacks += 1
+
+
+class FakeConnection:
+    """Answers every query with `results(query, parameters)`, which returns an iterable of records.
+
+    Schema queries of the completion are answered from `schema`, a dictionary with the keys `labels`,
+    `relationship_types`, `property_keys`, and `procedures`. All queries are recorded in `queries`, the transaction
+    tags of streamed queries in `tags`, and the tags passed to `terminate` in `terminated`.
+    """
+
+    pool_size = 1
+    idle_sessions = 0
+    last_pool_wait = 0.0
+
+    def __init__(self, results=None, schema=None):
+        self.results = results or (lambda query, parameters: ())
+        self.schema = schema or {}
+        self.queries = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.tags = []
+        self.terminated = []
+
+    def _schema_records(self, query):
+        for marker, key, column in (
+            ("db.labels", "labels", "label"),
+            ("db.relationshipTypes", "relationship_types", "type"),
+            ("db.propertyKeys", "property_keys", "propertyKey"),
+            ("PROCEDURES", "procedures", "name"),
+        ):
+            if marker in query:
+                return [Record([(column, name)]) for name in self.schema.get(key, ())]
+        return None
+
+    def stream(
+        self,
+        query,
+        parameters=None,
+        db=None,
+        fetch_size=1000,
+        tag=None,
+        timeout=None,
+        discard=False,
+        access_mode=None,
+    ):
+        self.queries.append((query, parameters))
+        self.tags.append(tag)
+        records = self._schema_records(query)
+        if records is None:
+            records = self.results(query, parameters)
+        if not discard:
+            yield from records
+        return fake_summary()
+
+    def query(self, query, parameters=None, db=None):
+        return list(self.stream(query, parameters, db))
+
+    def summarize(self, query, parameters=None, db=None, tag=None, timeout=None):
+        self.queries.append((query, parameters))
+        return fake_summary()
+
+    def begin(self, db=None, fetch_size=1000, tag=None, timeout=None):
+        return FakeTransaction(self)
+
+    def terminate(self, tag, db=None):
+        self.terminated.append(tag)
+        return []
+
+    def reconnect(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def consume(self):
+        return fake_summary()
+
+
+class FakeDriverTransaction:
+    def __init__(self, session):
+        self.session = session
+        self.state = "open"
+
+    def run(self, query, parameters=None):
+        return self.session.run(query, parameters)
+
+    def commit(self):
+        self.state = "committed"
+
+    def rollback(self):
+        self.state = "rolled back"
+
+    def closed(self):
+        return self.state != "open"
+
+
+class FakeDriverSession:
+    def __init__(self, driver, config):
+        self.driver = driver
+        self.config = config
+        self.closed = False
+
+    def run(self, query, parameters=None):
+        self.driver.server.fail()
+        text = getattr(query, "text", query)
+        self.driver.server.queries.append((text, parameters))
+        return FakeResult(list(self.driver.server.results(text, parameters)))
+
+    def begin_transaction(self, metadata=None, timeout=None):
+        self.driver.server.fail()
+        return FakeDriverTransaction(self)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDriver:
+    def __init__(self, server):
+        self.server = server
+        self.sessions = []
+        self.closed = False
+
+    def session(self, **config):
+        session = FakeDriverSession(self, config)
+        self.sessions.append(session)
+        return session
+
+    def verify_connectivity(self):
+        self.server.checks += 1
+        # Like in driver 4.4
+        warnings.warn("The configuration may change in the future.", ExperimentalWarning)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeServer:
+    """The database behind the drivers of a real `Neo4jConnection`, see `fake_driver`.
+
+    Queries are answered with `results(query, parameters)` and recorded in `queries`. The next `failures` queries or
+    transactions fail with `ServiceUnavailable`, like after a restart of the database. Every driver the connection
+    creates is kept in `drivers`, and their liveness checks are counted in `checks`.
+    """
+
+    def __init__(self, results=None, failures=0):
+        self.results = results or (lambda query, parameters: ())
+        self.failures = failures
+        self.checks = 0
+        self.queries = []
+        self.drivers = []
+
+    def fail(self):
+        if self.failures:
+            self.failures -= 1
+            raise ServiceUnavailable("The database is unavailable")
+
+    def driver(self, uri, auth=None, **config):
+        driver = FakeDriver(self)
+        self.drivers.append(driver)
+        return driver
+
+
+def fake_driver(monkeypatch, results=None, failures=0):
+    """Let `Neo4jConnection` create `FakeDriver`s of the returned `FakeServer`, monkeypatch is the pytest fixture."""
+    import cypher_kernel.neo4j_connection
+
+    server = FakeServer(results, failures)
+    monkeypatch.setattr(cypher_kernel.neo4j_connection, "GraphDatabase", SimpleNamespace(driver=server.driver))
+    return server
+
+
+class FakeSession(Session):
+    """A session, which records the messages the kernel sends instead of sending them over ZeroMQ.
+
+    With `keep=False`, only the message types are recorded, e.g., for benchmarks with large outputs.
+    """
+
+    def __init__(self, keep=True, **kwargs):
+        super().__init__(**kwargs)
+        self.keep = keep
+        self.messages = []
+
+    def send(self, stream, msg_or_type, content=None, *args, **kwargs):
+        self.messages.append((msg_or_type, content if self.keep else None))
+
+
+def fake_kernel(conn, monkeypatch, tmp_path, config="", keep=True):
+    """A kernel, which runs on `conn` with the YAML `config`, monkeypatch and tmp_path are the pytest fixtures."""
+    import cypher_kernel.kernel
+
+    config_dir = tmp_path / "jupyter"
+    config_dir.mkdir(exist_ok=True)
+    (config_dir / "cypher_config.yml").write_text(config)
+    monkeypatch.setenv("JUPYTER_CONFIG_DIR", str(config_dir))
+    monkeypatch.setattr(cypher_kernel.kernel, "Neo4jConnection", lambda **kwargs: conn)
+    kernel = cypher_kernel.kernel.CypherKernel(session=FakeSession(keep=keep))
+    kernel.iopub_socket = None
+    return kernel
@@ -0,0 +1,90 @@
+import json
+import threading
+from types import SimpleNamespace
+import pytest
+from neo4j.exceptions import TransientError
+from .context import cypher_kernel
+from cypher_kernel.bulk_import import BulkImporter, import_query, parse_import_args, read_chunks
+
+
+class FakeConn:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def summarize(self, query, parameters=None, db=None, tag=None, timeout=None):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise TransientError("Deadlock detected")
+            self.batches.append((threading.current_thread().name, parameters["rows"]))
+        return SimpleNamespace(counters=SimpleNamespace(nodes_created=len(parameters["rows"])))
+
+
+def test_parse_import_args():
+    args = parse_import_args("'data/my people.csv' --batch-size 500 --writers 4 --partition label", writers=2)
+    assert (args.path, args.format, args.batch_size, args.writers, args.partition) == (
+        "data/my people.csv",
+        "csv",
+        500,
+        4,
+        "label",
+    )
+    assert parse_import_args("people.ndjson").format == "jsonl"
+    with pytest.raises(ValueError):
+        parse_import_args("people.txt")
+    with pytest.raises(ValueError):
+        parse_import_args("people.csv --batch-size 0")
+
+
+def test_import_query():
+    assert import_query("CREATE (:Person {name: row.name});") == "UNWIND $rows AS row\nCREATE (:Person {name: row.name})"
+    assert import_query("UNWIND $rows AS r CREATE (:P {n: r.n})").startswith("UNWIND $rows AS r")
+    with pytest.raises(ValueError):
+        import_query("  ")
+
+
+def test_read_chunks(tmp_path):
+    path = tmp_path / "people.csv"
+    path.write_text("name,age\n" + "".join(f"p{i},{i if i % 2 else ''}\n" for i in range(5)))
+    chunks = list(read_chunks(str(path), "csv", 2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert chunks[0] == [{"name": "p0", "age": None}, {"name": "p1", "age": "1"}]
+
+    path = tmp_path / "people.jsonl"
+    path.write_text("\n".join(json.dumps({"name": f"p{i}"}) for i in range(3)) + "\n\n")
+    assert [len(c) for c in read_chunks(str(path), "jsonl", 2)] == [2, 1]
+
+
+def test_import_retries_and_counts():
+    conn = FakeConn(failures=1)
+    chunks = ([{"n": i} for i in range(start, start + 10)] for start in range(0, 100, 10))
+    importer = BulkImporter(conn, "UNWIND $rows AS row CREATE (:N {n: row.n})", batch_size=10, writers=3, retries=2)
+    importer.run(chunks)
+    assert importer.rows == 100
+    assert importer.batches == 10
+    assert importer.retried == 1
+    assert importer.counters == {"nodes_created": 100}
+    assert "Imported 100 rows in 10 batches" in importer.report()
+
+
+def test_partitioned_import_keeps_partitions_on_one_writer():
+    conn = FakeConn()
+    rows = [{"label": label, "n": i} for i in range(30) for label in ("Person", "Movie", "Genre")]
+    chunks = (rows[i : i + 7] for i in range(0, len(rows), 7))
+    importer = BulkImporter(conn, "...", batch_size=5, writers=2, partition="label")
+    importer.run(chunks)
+    assert importer.rows == len(rows)
+    writers = {}
+    for thread, batch in conn.batches:
+        assert len(batch) <= 5
+        for row in batch:
+            writers.setdefault(row["label"], set()).add(thread)
+    assert all(len(threads) == 1 for threads in writers.values())
+
+
+def test_import_gives_up_after_retries():
+    importer = BulkImporter(FakeConn(failures=5), "...", batch_size=1, retries=1)
+    with pytest.raises(TransientError):
+        importer.run([[{"n": 1}]])
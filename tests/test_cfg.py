@@ -1,2 +0,0 @@
-user = 'neo4j'
-pwd = 'neo4j'
\ No newline at end of file
@@ -0,0 +1,39 @@
+from .context import cypher_kernel
+from cypher_kernel.cypher_keywords import KEYWORDS
+from cypher_kernel.schema import PrefixIndex, SchemaSnapshot, complete
+
+
+SNAPSHOT = SchemaSnapshot(
+    labels=["Person", "Movie", "Place"],
+    relationship_types=["ACTED_IN", "DIRECTED"],
+    property_keys=["name", "title", "born"],
+    procedures=["db.labels", "db.propertyKeys", "apoc.meta.graph"],
+)
+KEYWORD_INDEX = PrefixIndex(KEYWORDS)
+
+
+def _complete(code, parameters=()):
+    return complete(code, len(code), SNAPSHOT, KEYWORD_INDEX, parameters)
+
+
+def test_prefix_index_is_deduplicated_and_case_insensitive():
+    index = PrefixIndex(["CREATE", "CREATE", "CONTAINS", "COMMIT", "CASE"])
+    assert len(index) == 4
+    assert index.lookup("co") == ["COMMIT", "CONTAINS"]
+    assert index.lookup("x") == []
+
+
+def test_keywords():
+    assert _complete("MATCH (n) RET") == (["RETURN"], 10)
+
+
+def test_labels_and_relationship_types():
+    assert _complete("MATCH (n:P") == (["Person", "Place"], 9)
+    assert _complete("MATCH (n)-[r:A") == (["ACTED_IN"], 13)
+    assert _complete("MATCH (n)-[:ACTED_IN|D") == (["DIRECTED"], 21)
+
+
+def test_property_keys_procedures_and_parameters():
+    assert _complete("MATCH (n) RETURN n.na") == (["name"], 19)
+    assert _complete("CALL db.") == (["db.labels", "db.propertyKeys"], 5)
+    assert _complete("MATCH (n {name: $na", parameters={"name", "born"}) == (["name"], 17)
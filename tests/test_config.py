@@ -0,0 +1,59 @@
+import os
+import pytest
+from .context import cypher_kernel
+from cypher_kernel.config import CONFIG_SCHEMA, ConfigError, ConfigLoader, CypherConfig
+
+
+def test_missing_file_uses_defaults(tmp_path):
+    cfg = ConfigLoader(path=str(tmp_path / "cypher_config.yml")).get()
+    assert cfg.as_dict() == {key: default for key, (_, default) in CONFIG_SCHEMA.items()}
+    assert cfg.unknown_keys == []
+
+
+def test_partial_file_keeps_defaults_and_reports_unknown_keys(tmp_path):
+    path = tmp_path / "cypher_config.yml"
+    path.write_text("user: 'alice'\nfetch_sise: 10\n")
+    cfg = ConfigLoader(path=str(path)).get()
+    assert cfg.user == "alice"
+    assert cfg["pwd"] == "pwd"
+    assert cfg.unknown_keys == ["fetch_sise"]
+
+
+def test_invalid_types_are_rejected():
+    with pytest.raises(ConfigError):
+        CypherConfig({"fetch_size": "many"})
+    with pytest.raises(ConfigError):
+        CypherConfig({"max_rows": True})
+
+
+def test_reload_only_on_change(tmp_path):
+    path = tmp_path / "cypher_config.yml"
+    path.write_text("user: 'alice'\n")
+    loader = ConfigLoader(path=str(path))
+    first = loader.get()
+    assert loader.get() is first
+
+    path.write_text("user: 'bob'\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    assert loader.get().user == "bob"
+
+
+def test_broken_file_on_first_load_uses_defaults(tmp_path):
+    path = tmp_path / "cypher_config.yml"
+    path.write_text("fetch_size: 'many'\n")
+    cfg = ConfigLoader(path=str(path)).get()
+    assert cfg.as_dict() == CypherConfig().as_dict()
+    assert "fetch_size" in cfg.error
+
+
+def test_broken_file_keeps_previous_config(tmp_path):
+    path = tmp_path / "cypher_config.yml"
+    path.write_text("user: 'alice'\n")
+    loader = ConfigLoader(path=str(path))
+    loader.get()
+
+    path.write_text("fetch_size: 'many'\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    assert loader.get().user == "alice"
@@ -0,0 +1,58 @@
+import json
+from .context import cypher_kernel
+from cypher_kernel.graph_reduce import reduce_graph
+from cypher_kernel.graph_render import first_label, graph_payload, render_graph_js
+from .fake_neo4j import fake_node, fake_relationship
+
+
+def test_payload_is_compact_and_escaped():
+    alice = fake_node(1, ["Person"], {"name": "Alice \"Al\" O'Neil <3"})
+    bob = fake_node(2, [], {})
+    knows = fake_relationship(3, alice, bob, "KNOWS")
+    payload = graph_payload([alice, bob], [knows], {"Person": "1,2,3,0.5"})
+    assert payload["nodes"] == [[1, "Person", "{name:Alice &quot;Al&quot; O&#x27;Neil &lt;3}"], [2, "", "{}"]]
+    assert payload["edges"] == [[1, 2, "KNOWS", 3]]
+    assert payload["colors"] == {"Person": "rgba(1,2,3,0.5)"}
+
+
+def test_graph_js_embeds_valid_json():
+    alice = fake_node(1, ["Person"], {"quote": "\"}]);alert(1)//"})
+    graph_js = render_graph_js([alice], [], "element", {"Person": "1,2,3,0.5"})
+    graph_json = graph_js.split("var graph = ", 1)[1].split(";\n", 1)[0]
+    assert json.loads(graph_json)["nodes"][0][0] == 1
+    assert "document.getElementById('element')" in graph_js
+
+
+def test_large_graphs_are_sampled_by_degree():
+    hub = fake_node(0, ["Hub"], {})
+    leaves = [fake_node(i, ["Leaf"], {}) for i in range(1, 6)]
+    spokes = [fake_relationship(10 + l.id, hub, l, "HAS") for l in leaves]
+    nodes, relations, note = reduce_graph({hub, *leaves}, set(spokes), max_nodes=3, max_edges=None)
+    assert hub in nodes
+    assert len(nodes) == 3
+    assert len(relations) == 2
+    assert note.startswith("The result has 6 nodes and 5 relationships")
+
+
+def test_large_graphs_are_summarized_by_label():
+    hub = fake_node(0, ["Hub"], {})
+    leaves = [fake_node(i, ["Leaf"], {}) for i in range(1, 6)]
+    spokes = [fake_relationship(10 + l.id, hub, l, "HAS") for l in leaves]
+    nodes, relations, _ = reduce_graph({hub, *leaves}, set(spokes), max_nodes=3, max_edges=None, mode="summary")
+    assert sorted((first_label(n.labels), n._properties["count"]) for n in nodes) == [("Hub", 1), ("Leaf", 5)]
+    assert [r.type for r in relations] == ["HAS (5)"]
+
+
+def test_small_graphs_are_not_reduced():
+    hub = fake_node(0, ["Hub"], {})
+    nodes, relations, note = reduce_graph({hub}, set(), max_nodes=3, max_edges=3)
+    assert nodes == {hub}
+    assert note is None
+
+
+def test_kernel_positions_turn_off_physics():
+    alice = fake_node(1, ["Person"], {})
+    payload = graph_payload([alice], [], {"Person": "1,2,3,0.5"}, positions={1: (10.04, -3.26)})
+    assert payload["nodes"] == [[1, "Person", "{}", 10.0, -3.3]]
+    assert payload["physics"] is False
+    assert graph_payload([alice], [], {})["physics"] is True
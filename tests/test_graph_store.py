@@ -0,0 +1,40 @@
+from .context import cypher_kernel
+from cypher_kernel.graph_render import graph_diff_payload
+from cypher_kernel.graph_store import GraphStore
+from .fake_neo4j import fake_node, fake_relationship
+
+
+def test_store_returns_only_changes():
+    store = GraphStore()
+    a, b, c = fake_node(1), fake_node(2), fake_node(3)
+    diff = store.add([a, b], [fake_relationship(10, a, b)])
+    assert [n.id for n in diff.nodes] == [1, 2]
+    assert [r.id for r in diff.relationships] == [10]
+
+    diff = store.add([b, c], [fake_relationship(10, a, b), fake_relationship(11, b, c)])
+    assert [n.id for n in diff.nodes] == [3]
+    assert [r.id for r in diff.relationships] == [11]
+    assert not store.add([a], [])
+
+    diff = store.add([fake_node(1, properties={"name": "Alice"})], [])
+    assert [n.id for n in diff.nodes] == [1]
+
+
+def test_store_evicts_least_recently_returned_nodes():
+    store = GraphStore()
+    a, b, c, d = (fake_node(i) for i in range(1, 5))
+    store.add([a, b, c], [fake_relationship(10, a, b), fake_relationship(11, b, c)])
+    store.add([a], [])
+    diff = store.add([d], [], max_nodes=3)
+    assert diff.removed_nodes == [2]
+    assert diff.removed_relationships == [10, 11]
+    assert list(store.nodes) == [3, 1, 4]
+    assert "-1 nodes, -2 relationships" in diff.describe()
+
+    payload = graph_diff_payload(diff, {"Person": "1,2,3,0.5"})
+    assert payload["nodes"] == [[4, "Person", "{}"]]
+    assert payload["removed_edges"] == [10, 11]
+
+    diff = store.clear()
+    assert diff.removed_nodes == [3, 1, 4]
+    assert len(store) == 0
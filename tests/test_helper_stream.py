@@ -0,0 +1,47 @@
+import pytest
+from pexpect.replwrap import bash
+from .context import cypher_kernel
+from .fake_neo4j import FakeConnection, fake_kernel
+from cypher_kernel.helper_stream import HelperInterrupted, stream_command
+
+
+@pytest.fixture(scope="module")
+def shell():
+    shell = bash()
+    shell.run_command("bind 'set enable-bracketed-paste off' 2>/dev/null")
+    yield shell
+    shell.child.terminate(force=True)
+
+
+def test_output_is_forwarded_while_the_command_runs(shell):
+    chunks = []
+    assert stream_command(shell, "echo first; sleep 0.5; echo second", chunks.append) == 0
+    assert chunks == ["first\n", "second\n"]
+
+
+def test_output_is_bounded(shell):
+    chunks = []
+    discarded = stream_command(shell, "seq 1 100000", chunks.append, max_bytes=100)
+    assert len("".join(chunks)) == 100
+    assert discarded == len("".join(f"{i}\n" for i in range(1, 100001))) - 100
+
+
+def test_timeout_interrupts_the_command(shell):
+    chunks = []
+    with pytest.raises(HelperInterrupted) as error:
+        stream_command(shell, "echo start; sleep 30", chunks.append, timeout=0.5)
+    assert error.value.alive
+    assert chunks[0] == "start\n"
+    chunks.clear()
+    stream_command(shell, "echo still here", chunks.append)
+    assert chunks == ["still here\n"]
+
+
+def test_bash_cell_streams_output(monkeypatch, tmp_path):
+    kernel = fake_kernel(FakeConnection(), monkeypatch, tmp_path, config="helper_max_bytes: 6\n")
+    assert kernel.do_execute("%%bash\necho hello world", False)["status"] == "ok"
+    messages = kernel.session.messages
+    assert [content["name"] for _, content in messages] == ["stdout", "stderr"]
+    assert messages[0][1]["text"] == "hello "
+    assert "6 more bytes" in messages[1][1]["text"]
+    kernel.do_shutdown(False)
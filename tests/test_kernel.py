@@ -0,0 +1,293 @@
+import os
+import time
+import signal
+import threading
+import pytest
+from neo4j import Record
+from .context import cypher_kernel
+from cypher_kernel.neo4j_connection import Neo4jConnection
+from .fake_neo4j import FakeConnection, fake_driver, fake_kernel, synthetic_records
+
+
+def _types(kernel):
+    return [msg_type for msg_type, _ in kernel.session.messages]
+
+
+def test_text_result_is_capped_and_continued(monkeypatch, tmp_path):
+    conn = FakeConnection(lambda query, parameters: synthetic_records(25, shape="scalar"))
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="fetch_size: 10\nmax_rows: 20\n")
+    assert kernel.do_execute("UNWIND range(1, 25) AS i RETURN i", False)["status"] == "ok"
+    assert kernel.last_result_stats["rows"] == 20
+    assert _types(kernel) == ["display_data", "stream"]
+    table = kernel.session.messages[0][1]["data"]["text/plain"].splitlines()
+    assert table[0].split() == ["i", "|", "f", "|", "s"]
+    assert len(table) == 22
+    assert "%%more" in kernel.session.messages[-1][1]["text"]
+
+    kernel.session.messages.clear()
+    assert kernel.do_execute("%%more", False)["status"] == "ok"
+    assert kernel.last_result_stats["rows"] == 5
+    assert kernel.do_execute("%%more", False)["status"] == "error"
+
+
+def test_byte_cap_and_more_fetch_every_record_once(monkeypatch, tmp_path):
+    conn = FakeConnection(lambda query, parameters: synthetic_records(25, shape="scalar"))
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="fetch_size: 10\nmax_bytes: 200\n")
+    assert kernel.do_execute("UNWIND range(1, 25) AS i RETURN i", False)["status"] == "ok"
+    rows = [kernel.last_result_stats["rows"]]
+    assert 0 < rows[0] < 25 and kernel.last_result_stats["size"] >= 200
+    while "%%more" in kernel.session.messages[-1][1].get("text", ""):
+        kernel.session.messages.clear()
+        assert kernel.do_execute("%%more", False)["status"] == "ok"
+        rows.append(kernel.last_result_stats["rows"])
+    assert sum(rows) == 25 and len(rows) > 2
+    assert len(conn.queries) == 1
+
+
+def test_byte_cap_counts_encoded_bytes(monkeypatch, tmp_path):
+    conn = FakeConnection(lambda query, parameters: (Record([("s", "ü" * 10)]) for _ in range(25)))
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="fetch_size: 10\nmax_bytes: 100\n")
+    kernel.do_execute("UNWIND range(1, 25) AS i RETURN i", False)
+    assert kernel.last_result_stats == {"rows": 5, "size": 100}
+
+
+def test_a_new_query_discards_the_pending_result(monkeypatch, tmp_path):
+    conn = FakeConnection(lambda query, parameters: synthetic_records(25 if "25" in query else 1, shape="scalar"))
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="max_rows: 10\n")
+    kernel.do_execute("UNWIND range(1, 25) AS i RETURN i", False)
+    assert kernel.do_execute("RETURN 1 AS i", False)["status"] == "ok"
+    assert "%%more" not in kernel.session.messages[-1][1].get("text", "")
+    assert kernel.do_execute("%%more", False)["status"] == "error"
+
+
+def test_graph_result_is_rendered(monkeypatch, tmp_path):
+    conn = FakeConnection(lambda query, parameters: synthetic_records(50, labels=2))
+    kernel = fake_kernel(conn, monkeypatch, tmp_path)
+    kernel.do_execute("MATCH (n)-[r]->(m) RETURN n, r, m", False)
+    assert _types(kernel) == ["display_data", "display_data", "display_data"]
+    assert set(kernel.global_node_colors) >= {"Label0", "Label1"}
+    assert kernel._metrics.rows == 50
+
+
+def test_statements_and_parameters(monkeypatch, tmp_path):
+    conn = FakeConnection()
+    kernel = fake_kernel(conn, monkeypatch, tmp_path)
+    kernel.do_execute("%%params\nname: Alice", False)
+    kernel.do_execute("CREATE (:Person {name: $name});\nMATCH (p:Person) RETURN p", False)
+    assert conn.queries == [("CREATE (:Person {name: $name})", {"name": "Alice"}), ("MATCH (p:Person) RETURN p", {})]
+    assert (conn.commits, conn.rollbacks) == (1, 0)
+
+
+def test_completion_uses_the_schema(monkeypatch, tmp_path):
+    conn = FakeConnection(schema={"labels": ["Person", "Place"], "property_keys": ["name"]})
+    kernel = fake_kernel(conn, monkeypatch, tmp_path)
+    kernel._schema._refreshing.acquire()
+    kernel._schema._refresh()
+    assert kernel.do_complete("MATCH (p:P", 10)["matches"] == ["Person", "Place"]
+
+
+def test_parallel_reads_in_statement_order(monkeypatch, tmp_path):
+    def results(query, parameters):
+        number = int(query.split()[1])
+        # Later statements finish first
+        time.sleep(0.05 * (4 - number))
+        return [Record([("x", number)])]
+
+    conn = FakeConnection(results)
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="parallel_max_concurrency: 4\n")
+    assert kernel.do_execute("%%parallel\nRETURN 1 AS x; RETURN 2 AS x; RETURN 3 AS x", False)["status"] == "ok"
+    tables = [content["data"]["text/plain"] for kind, content in kernel.session.messages if kind == "display_data"]
+    assert [table.splitlines()[-1] for table in tables] == ["1", "2", "3"]
+    assert "3 queries in" in kernel.session.messages[-1][1]["text"]
+
+    kernel.session.messages.clear()
+    assert kernel.do_execute("%%parallel\nRETURN 1; CREATE (n)", False)["status"] == "error"
+    assert len(conn.queries) == 3
+
+
+def test_python_cell_after_a_cypher_cell(monkeypatch, tmp_path):
+    conn = FakeConnection(lambda query, parameters: synthetic_records(3, shape="scalar"))
+    kernel = fake_kernel(conn, monkeypatch, tmp_path)
+    kernel.do_execute("UNWIND range(1, 3) AS i RETURN i", False)
+    kernel.session.messages.clear()
+    try:
+        assert kernel.do_execute("%%python\nprint(len(df), plan)", False)["status"] == "ok"
+        assert "".join(content["text"] for _, content in kernel.session.messages) == "3 None\n"
+    finally:
+        kernel.do_shutdown(False)
+
+
+def test_table_of_a_slow_result_is_shown_while_fetching(monkeypatch, tmp_path):
+    def results(query, parameters):
+        for record in synthetic_records(30, shape="scalar"):
+            if record["i"] % 10 == 0:
+                time.sleep(0.02)
+            yield record
+
+    kernel = fake_kernel(FakeConnection(results), monkeypatch, tmp_path, config="fetch_size: 10\n")
+    kernel.table_refresh_interval = 0.01
+    kernel.do_execute("UNWIND range(1, 30) AS i RETURN i", False)
+    messages = kernel.session.messages
+    assert _types(kernel) == ["display_data"] + ["update_display_data"] * 3
+    display_ids = {content["transient"]["display_id"] for _, content in messages}
+    assert len(display_ids) == 1
+    assert [len(content["data"]["text/plain"].splitlines()) - 2 for _, content in messages] == [10, 20, 30, 30]
+
+
+def test_records_are_only_kept_for_a_python_namespace(monkeypatch, tmp_path):
+    conn = FakeConnection(lambda query, parameters: synthetic_records(3, shape="node"))
+    kernel = fake_kernel(conn, monkeypatch, tmp_path)
+    kernel.do_execute("MATCH (n) RETURN n", False)
+    columns = kernel._python_env_result[0]
+    assert not isinstance(columns, list)
+    assert columns.columns == ["n"] and [node["_id"] for node in columns.data["n"]] == [0, 1, 2]
+
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="python_mode: 'kernel'\n")
+    kernel.do_execute("MATCH (n) RETURN n", False)
+    assert len(kernel._python_env_result[0]) == 3
+
+
+def test_helper_cells_on_platforms_without_a_terminal(monkeypatch, tmp_path):
+    kernel = fake_kernel(FakeConnection(), monkeypatch, tmp_path)
+    monkeypatch.setattr(cypher_kernel.kernel.platform, "system", lambda: "Windows")
+    for cell in ("%%bash\necho hello", "%%python\nprint(1)"):
+        assert kernel.do_execute(cell, False)["status"] == "error"
+        assert "not supported on Windows" in kernel.session.messages[-1][1]["data"]["text/plain"]
+    assert kernel._my_shell is None and kernel._my_python is None
+
+
+def test_summary_graphs_do_not_share_layout_positions_with_nodes(monkeypatch, tmp_path):
+    pytest.importorskip("numpy")
+    conn = FakeConnection(lambda query, parameters: synthetic_records(20, labels=2))
+    config = "graph_layout: 'kernel'\ngraph_reduction: 'summary'\ngraph_max_nodes: 10\n"
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config=config)
+    kernel.do_execute("MATCH (n)-[r]->(m) RETURN n, r, m", False)
+    assert set(kernel._layout_cache.positions) == {("summary", "Label0"), ("summary", "Label1")}
+
+
+def _interrupt_after(seconds):
+    timer = threading.Timer(seconds, lambda: os.kill(os.getpid(), signal.SIGINT))
+    timer.start()
+    return timer
+
+
+def test_interrupting_a_query_terminates_its_transaction(monkeypatch, tmp_path):
+    terminated = threading.Event()
+
+    class TerminatingConnection(FakeConnection):
+        def terminate(self, tag, db=None):
+            # Like on the server, the terminated transaction ends the pending fetch
+            terminated.set()
+            return super().terminate(tag, db)
+
+    def results(query, parameters):
+        terminated.wait(5)
+        return [Record([("x", 1)])]
+
+    conn = TerminatingConnection(results)
+    kernel = fake_kernel(conn, monkeypatch, tmp_path)
+    worker = kernel._query_executor
+    _interrupt_after(0.3)
+    assert kernel.do_execute("RETURN 1 AS x", False)["status"] == "error"
+    assert conn.tags[0] and conn.terminated == conn.tags
+    assert "Query interrupted" in kernel.session.messages[-1][1]["data"]["text/plain"]
+    # The worker came back in time and is kept
+    assert kernel._query_executor is worker
+
+
+def test_interrupting_a_stuck_statement_returns_an_error(monkeypatch, tmp_path):
+    release = threading.Event()
+
+    def results(query, parameters):
+        if "2" in query:
+            release.wait(5)
+        return [Record([("x", 1)])]
+
+    conn = FakeConnection(results)
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="multi_statement_mode: 'autocommit'\n")
+    kernel.cancel_timeout = 0.1
+    _interrupt_after(0.3)
+    try:
+        assert kernel.do_execute("RETURN 1 AS x; RETURN 2 AS x", False)["status"] == "error"
+    finally:
+        release.set()
+    assert "Statement 2 of 2 was interrupted" in kernel.session.messages[-1][1]["data"]["text/plain"]
+
+
+def test_invalid_configuration_falls_back_to_defaults(monkeypatch, tmp_path):
+    conn = FakeConnection(lambda query, parameters: synthetic_records(3, shape="scalar"))
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="fetch_size: 'many'\n")
+    assert kernel.do_execute("UNWIND range(1, 3) AS i RETURN i", False)["status"] == "ok"
+    errors = [content["text"] for msg_type, content in kernel.session.messages if msg_type == "stream"]
+    assert len(errors) == 1 and "fetch_size" in errors[0]
+    kernel.session.messages.clear()
+    kernel.do_execute("UNWIND range(1, 3) AS i RETURN i", False)
+    assert not [msg_type for msg_type, _ in kernel.session.messages if msg_type == "stream"]
+
+
+def test_interrupting_a_stuck_parallel_cell_keeps_the_query_worker(monkeypatch, tmp_path):
+    release = threading.Event()
+
+    def results(query, parameters):
+        release.wait(5)
+        return [Record([("x", 1)])]
+
+    conn = FakeConnection(results)
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="parallel_max_concurrency: 1\n")
+    kernel.cancel_timeout = 0.1
+    worker = kernel._query_executor
+    _interrupt_after(0.3)
+    try:
+        assert kernel.do_execute("%%parallel\nRETURN 1 AS x; RETURN 2 AS x; RETURN 3 AS x", False)["status"] == "error"
+    finally:
+        release.set()
+    assert kernel._query_executor is worker
+    # Statements, which did not start before the interrupt, never run
+    assert len(conn.queries) == 1
+
+
+def test_unavailable_database_returns_an_error(monkeypatch, tmp_path):
+    server = fake_driver(monkeypatch, lambda query, parameters: [Record([("x", 1)])], failures=2)
+    kernel = fake_kernel(Neo4jConnection(), monkeypatch, tmp_path)
+    assert kernel.do_execute("RETURN 1 AS x", False)["status"] == "error"
+    assert "unavailable" in kernel.session.messages[-1][1]["data"]["text/plain"]
+
+    server.failures = 2
+    assert kernel.do_execute("%%parallel\nRETURN 1 AS x; RETURN 2 AS x", False)["status"] == "error"
+    server.failures = 2
+    assert kernel.do_execute("RETURN 1 AS x; RETURN 2 AS x", False)["status"] == "error"
+    # The database is back
+    assert kernel.do_execute("RETURN 1 AS x", False)["status"] == "ok"
+
+
+def test_interrupting_the_connection_of_result_nodes_returns_an_error(monkeypatch, tmp_path):
+    terminated = threading.Event()
+
+    class TerminatingConnection(FakeConnection):
+        def terminate(self, tag, db=None):
+            terminated.set()
+            return super().terminate(tag, db)
+
+    def results(query, parameters):
+        if "$new" in query:
+            terminated.wait(5)
+            return []
+        return synthetic_records(2, shape="node")
+
+    conn = TerminatingConnection(results)
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="connect_result_nodes: true\n")
+    _interrupt_after(0.3)
+    assert kernel.do_execute("MATCH (n) RETURN n", False)["status"] == "error"
+    assert conn.terminated == conn.tags[-1:]
+    assert "Query interrupted" in kernel.session.messages[-1][1]["data"]["text/plain"]
+
+
+def test_empty_results_are_shown(monkeypatch, tmp_path):
+    kernel = fake_kernel(FakeConnection(), monkeypatch, tmp_path)
+    assert kernel.do_execute("MATCH (n:Missing) RETURN n", False)["status"] == "ok"
+    assert kernel.session.messages[0] == ("display_data", {"data": {"text/plain": "(no rows)"}, "metadata": {}})
+
+    kernel.session.messages.clear()
+    kernel.do_execute("%%parallel\nMATCH (a:Missing) RETURN a; MATCH (b:Missing) RETURN b", False)
+    tables = [content["data"]["text/plain"] for kind, content in kernel.session.messages if kind == "display_data"]
+    assert tables == ["(no rows)", "(no rows)"]
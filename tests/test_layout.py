@@ -0,0 +1,33 @@
+import pytest
+from .context import cypher_kernel
+from cypher_kernel.layout import LayoutCache
+
+pytest.importorskip("numpy")
+
+
+def test_known_nodes_keep_their_positions():
+    cache = LayoutCache()
+    first = cache.layout(range(20), [(i, i + 1) for i in range(19)], iterations=20)
+    second = cache.layout(range(10, 30), [(i, i + 1) for i in range(10, 29)], iterations=20)
+    assert all(second[i] == first[i] for i in range(10, 20))
+    assert len(cache) == 30
+
+
+def test_connected_nodes_end_up_closer_than_unconnected_ones():
+    cache = LayoutCache(repulsion_sample=5)
+    positions = cache.layout(range(10), [(0, 1)], iterations=50)
+
+    def dist(a, b):
+        return ((positions[a][0] - positions[b][0]) ** 2 + (positions[a][1] - positions[b][1]) ** 2) ** 0.5
+
+    assert dist(0, 1) < sum(dist(0, i) for i in range(2, 10)) / 8
+
+
+def test_positions_are_bounded_by_recent_use():
+    cache = LayoutCache(max_positions=15)
+    first = cache.layout(range(10), [], iterations=5)
+    cache.layout(range(5), [], iterations=5)
+    cache.layout(range(10, 20), [], iterations=5)
+    assert len(cache) == 15
+    assert set(cache.positions) == set(range(5)) | set(range(10, 20))
+    assert all(cache.positions[i] == first[i] for i in range(5))
@@ -0,0 +1,53 @@
+import json
+from types import SimpleNamespace
+from .context import cypher_kernel
+from cypher_kernel.metrics import CellMetrics, MetricsExporter
+
+
+def _metrics(kind="cypher"):
+    metrics = CellMetrics(1, kind)
+    metrics.add_time("fetch", 0.25)
+    metrics.add_time("fetch", 0.25)
+    summary = SimpleNamespace(
+        result_available_after=3, result_consumed_after=5, counters=SimpleNamespace(nodes_created=2)
+    )
+    metrics.add_summary(summary)
+    metrics.rows, metrics.bytes = 10, 100
+    metrics.finish()
+    return metrics
+
+
+def test_cell_metrics():
+    record = _metrics().as_dict()
+    assert record["timings"]["fetch"] == 0.5
+    assert record["timings"]["server_available"] == 0.003
+    assert record["counters"] == {"nodes_created": 2}
+    assert "10 rows, 100 bytes" in _metrics().footer()
+
+
+def test_jsonl_export_appends(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    exporter = MetricsExporter(str(path))
+    exporter.export(_metrics())
+    exporter.export(_metrics())
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["rows"] == 10
+
+
+def test_prometheus_export_accumulates(tmp_path):
+    path = tmp_path / "cypher_kernel.prom"
+    exporter = MetricsExporter(str(path), format="prometheus")
+    exporter.export(_metrics())
+    exporter.export(_metrics())
+    text = path.read_text()
+    assert 'cypher_kernel_cells_total{kind="cypher",status="ok"} 2' in text
+    assert 'cypher_kernel_phase_seconds_total{kind="cypher",status="ok",phase="fetch"} 1.000000' in text
+
+
+def test_prometheus_label_values_are_escaped(tmp_path):
+    path = tmp_path / "cypher_kernel.prom"
+    MetricsExporter(str(path), format="prometheus").export(_metrics('ty"po\\\n'))
+    text = path.read_text()
+    assert 'cypher_kernel_cells_total{kind="ty\\"po\\\\\\n",status="ok"} 1' in text
+    assert all(line.startswith(("#", "cypher_kernel_")) for line in text.splitlines())
@@ -0,0 +1,86 @@
+import warnings
+import pytest
+from neo4j import Record
+from neo4j.exceptions import ServiceUnavailable
+from .context import cypher_kernel
+from cypher_kernel.neo4j_connection import Neo4jConnection
+from .fake_neo4j import fake_driver
+
+
+def _records(query, parameters):
+    return [Record([("x", 1)]), Record([("x", 2)])]
+
+
+def test_sessions_are_reused_per_database_and_fetch_size(monkeypatch):
+    server = fake_driver(monkeypatch, _records)
+    conn = Neo4jConnection()
+    assert [record["x"] for record in conn.stream("RETURN 1")] == [1, 2]
+    assert conn.query("RETURN 2") == _records(None, None)
+    driver = server.drivers[0]
+    assert len(driver.sessions) == 1 and conn.idle_sessions == 1
+
+    list(conn.stream("RETURN 3", fetch_size=10))
+    assert len(driver.sessions) == 2 and conn.idle_sessions == 2
+    assert driver.sessions[1].config == {"fetch_size": 10}
+
+
+def test_partially_consumed_result_closes_its_session(monkeypatch):
+    server = fake_driver(monkeypatch, _records)
+    conn = Neo4jConnection()
+    records = conn.stream("RETURN 1")
+    next(records)
+    records.close()
+    assert server.drivers[0].sessions[0].closed
+    assert conn.idle_sessions == 0
+
+
+def test_stream_reconnects_once_after_service_unavailable(monkeypatch):
+    server = fake_driver(monkeypatch, _records, failures=1)
+    conn = Neo4jConnection()
+    assert [record["x"] for record in conn.stream("RETURN 1")] == [1, 2]
+    first, second = server.drivers
+    assert first.closed and first.sessions[0].closed
+    assert not second.closed and conn.idle_sessions == 1
+
+    server.failures = 2
+    with pytest.raises(ServiceUnavailable):
+        list(conn.stream("RETURN 1"))
+    assert len(server.drivers) == 3
+
+
+def test_begin_reconnects_once_after_service_unavailable(monkeypatch):
+    server = fake_driver(monkeypatch, _records, failures=1)
+    conn = Neo4jConnection()
+    tx = conn.begin()
+    assert [record["x"] for record in tx.stream("RETURN 1")] == [1, 2]
+    tx.commit()
+    assert len(server.drivers) == 2 and server.drivers[0].closed
+    assert conn.idle_sessions == 1
+
+    server.failures = 2
+    with pytest.raises(ServiceUnavailable):
+        conn.begin()
+
+
+def test_liveness_check_does_not_warn(monkeypatch):
+    server = fake_driver(monkeypatch, _records)
+    conn = Neo4jConnection(liveness_check_timeout=0)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        conn.query("RETURN 1")
+    assert server.checks == 1 and caught == []
+
+
+def test_sessions_of_a_replaced_driver_are_not_pooled(monkeypatch):
+    server = fake_driver(monkeypatch, _records)
+    conn = Neo4jConnection()
+    records = conn.stream("RETURN 1")
+    next(records)
+    # E.g., a `%%more` continuation after another query reconnected
+    conn.reconnect()
+    assert [record["x"] for record in records] == [2]
+    old, new = server.drivers
+    assert old.sessions[0].closed and conn.idle_sessions == 0
+
+    conn.query("RETURN 2")
+    assert len(new.sessions) == 1 and conn.idle_sessions == 1
@@ -0,0 +1,25 @@
+import pytest
+from .context import cypher_kernel
+from cypher_kernel.parameters import ParameterStore, parameter_names, parse_parameters
+
+
+def test_parameter_names():
+    query = "MATCH (p:Person {name: $name}) WHERE p.born > $year AND p.note <> '$quoted' // $comment\nRETURN p"
+    assert parameter_names(query) == {"name", "year"}
+
+
+def test_parse_parameters():
+    assert parse_parameters("name: Tom Hanks\nyears: [1990, 2000]\n") == {"name": "Tom Hanks", "years": [1990, 2000]}
+    assert parse_parameters("") == {}
+    with pytest.raises(ValueError):
+        parse_parameters("- a list")
+    with pytest.raises(ValueError):
+        parse_parameters("not-a-name: 1")
+
+
+def test_store_only_passes_used_parameters():
+    store = ParameterStore(name="Tom Hanks", year=1990)
+    assert store.for_query("MATCH (p {name: $name}) RETURN p") == {"name": "Tom Hanks"}
+    assert store.for_query("RETURN $other") == {}
+    assert store.describe() == '$name: "Tom Hanks"\n$year: 1990'
+    assert ParameterStore().describe() == "No parameters set."
@@ -0,0 +1,44 @@
+import pytest
+from .context import cypher_kernel
+from cypher_kernel.python_env import HELPER_SETUP, result_payload, write_handoff
+from .fake_neo4j import fake_node, fake_relationship
+
+
+def _helper():
+    pytest.importorskip("pandas")
+    pytest.importorskip("networkx")
+    namespace = {}
+    exec(HELPER_SETUP, namespace)
+    return namespace
+
+
+def test_handoff_builds_multidigraph_and_adjacency():
+    pytest.importorskip("scipy")
+    helper = _helper()
+    alice = fake_node(7, ["Person"], {"name": "Alice"})
+    bob = fake_node(3, ["Person"], {"name": "Bob"})
+    # Parallel relationships count twice, the end node 42 is not part of the result
+    relations = [
+        fake_relationship(1, alice, bob, "KNOWS", {"since": 2001}),
+        fake_relationship(2, alice, bob, "LIKES"),
+        fake_relationship(5, bob, fake_node(42, [], {}), "KNOWS"),
+    ]
+    helper["_cypher_kernel_load"](write_handoff(result_payload([], [alice, bob], relations, adjacency=True)))
+
+    G = helper["G"]
+    assert G.number_of_edges() == 3
+    assert G.nodes[7]["name"] == "Alice"
+    assert G.edges[7, 3, 1] == {"since": 2001, "type": "KNOWS"}
+
+    A, node_index = helper["A"], helper["node_index"]
+    assert list(helper["node_ids"]) == [3, 7, 42]
+    assert A.shape == (3, 3)
+    assert A[node_index[7], node_index[3]] == 2
+    assert A[node_index[3], node_index[42]] == 1
+    assert A.nnz == 2
+
+
+def test_handoff_without_adjacency():
+    helper = _helper()
+    helper["_cypher_kernel_load"](write_handoff(result_payload([], [], [])))
+    assert helper["A"] is None
@@ -0,0 +1,51 @@
+import sys
+import pytest
+from .context import cypher_kernel
+from .fake_neo4j import FakeConnection, fake_kernel, synthetic_records
+
+pytest.importorskip("pandas")
+pytest.importorskip("networkx")
+
+
+def _kernel(monkeypatch, tmp_path):
+    conn = FakeConnection(lambda query, parameters: synthetic_records(4, shape="triple"))
+    return fake_kernel(conn, monkeypatch, tmp_path, config="python_mode: 'kernel'\n")
+
+
+def test_result_objects_are_shared_without_a_helper(monkeypatch, tmp_path):
+    kernel = _kernel(monkeypatch, tmp_path)
+    kernel.do_execute("MATCH (n)-[r]->(m) RETURN n, r, m", False)
+    kernel.session.messages.clear()
+
+    code = "%%python\nprint(len(records), G.number_of_edges())\nfor i in range(2):\n    print(i)\ndf[['r']]"
+    assert kernel.do_execute(code, False)["status"] == "ok"
+    assert kernel._my_python is None
+    messages = kernel.session.messages
+    assert "".join(content["text"] for msg_type, content in messages if msg_type == "stream") == "4 4\n0\n1\n"
+    msg_type, content = messages[-1]
+    assert msg_type == "display_data"
+    assert set(content["data"]) == {"text/plain", "text/html"}
+    assert kernel.python_namespace.globals["records"][0]["r"].type == "TYPE0"
+
+
+def test_errors_and_parameters(monkeypatch, tmp_path):
+    kernel = _kernel(monkeypatch, tmp_path)
+    assert kernel.do_execute("%%python\nyear = 1999\n1 / 0", False)["status"] == "error"
+    msg_type, content = kernel.session.messages[-1]
+    assert content["name"] == "stderr"
+    assert content["text"].splitlines()[-1] == "ZeroDivisionError: division by zero"
+    assert "1 / 0" in content["text"]
+    assert "python_namespace.py" not in content["text"]
+
+    kernel.do_execute("%%params --python year", False)
+    assert kernel._parameters == {"year": 1999}
+    assert kernel.do_execute("%%params --python missing", False)["status"] == "error"
+
+
+@pytest.mark.parametrize("code", ["import sys\nsys.exit(3)", "exit()", "quit()"])
+def test_exit_ends_the_cell_but_not_the_kernel(monkeypatch, tmp_path, code):
+    kernel = _kernel(monkeypatch, tmp_path)
+    assert kernel.do_execute("%%python\n" + code, False)["status"] == "error"
+    assert "SystemExit" in kernel.session.messages[-1][1]["text"]
+    assert not sys.stdin.closed
+    assert kernel.do_execute("%%python\nprint('still here')", False)["status"] == "ok"
@@ -0,0 +1,51 @@
+from .context import cypher_kernel
+from cypher_kernel.query_plan import most_expensive, plan_rows, render_plan_html, render_plan_text, structured_plan
+
+
+PROFILE = {
+    "operatorType": "ProduceResults@neo4j",
+    "identifiers": ["n"],
+    "args": {"EstimatedRows": 10.0, "Details": "n"},
+    "dbHits": 0,
+    "rows": 10,
+    "time": 120000,
+    "children": [
+        {
+            "operatorType": "Filter@neo4j",
+            "identifiers": ["n"],
+            "args": {"EstimatedRows": 10.0, "Details": "n.name = $name"},
+            "dbHits": 200,
+            "rows": 10,
+            "children": [
+                {
+                    "operatorType": "AllNodesScan@neo4j",
+                    "identifiers": ["n"],
+                    "args": {"EstimatedRows": 100.0},
+                    "dbHits": 101,
+                    "rows": 100,
+                    "children": [],
+                }
+            ],
+        }
+    ],
+}
+
+
+def test_plan_rows_are_depth_first():
+    rows = plan_rows(PROFILE)
+    assert [(row["depth"], row["operator"]) for row in rows] == [(0, "ProduceResults"), (1, "Filter"), (2, "AllNodesScan")]
+    assert rows[0]["time_ms"] == 0.12
+    assert rows[2]["details"] == "n"
+
+
+def test_most_expensive_operators_are_highlighted():
+    rows = plan_rows(PROFILE)
+    assert most_expensive(rows, profiled=True) == {1, 2}
+    assert render_plan_text(rows, profiled=True).splitlines()[4].startswith("*    +AllNodesScan")
+    assert render_plan_html(rows, profiled=True).count("background-color") == 2
+
+
+def test_structured_plan():
+    plan = structured_plan(PROFILE)
+    assert plan["operator"] == "ProduceResults"
+    assert plan["children"][0]["children"][0]["db_hits"] == 101
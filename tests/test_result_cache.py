@@ -0,0 +1,52 @@
+from .context import cypher_kernel
+from cypher_kernel.result_cache import ResultCache, is_cacheable, is_write_query, normalize_query
+from .fake_neo4j import FakeConnection, fake_kernel, synthetic_records
+
+
+def test_normalize_query_keeps_literals():
+    query = 'MATCH  (n)   // all of them\nWHERE n.name = "a  b"\nRETURN n;'
+    assert normalize_query(query) == 'MATCH (n) WHERE n.name = "a  b" RETURN n'
+
+
+def test_write_detection():
+    assert is_write_query("MATCH (n) DETACH DELETE n")
+    assert is_write_query("MERGE (a:User {id: 'Alice'})")
+    assert is_write_query("CALL apoc.create.node(['Person'], {})")
+    assert not is_write_query("MATCH (n) WHERE n.name = 'CREATE' RETURN n")
+    assert not is_write_query("CALL db.labels()")
+
+
+def test_volatile_queries_are_not_cacheable():
+    assert is_cacheable("MATCH (n) RETURN count(n)")
+    assert not is_cacheable("RETURN rand()")
+    assert not is_cacheable("SHOW TRANSACTIONS")
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResultCache(max_entries=2, max_bytes=100)
+    cache.put("a", [1], 10)
+    cache.put("b", [2], 10)
+    assert cache.get("a") == [1]
+    cache.put("c", [3], 10)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    cache.put("d", [4], 95)
+    assert len(cache) == 1
+    assert cache.size == 95
+    assert cache.evictions == 3
+
+
+def test_profiled_writes_clear_the_cache(monkeypatch, tmp_path):
+    conn = FakeConnection(lambda query, parameters: synthetic_records(3, shape="scalar"))
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config="cache_enabled: true\n")
+    kernel.do_execute("MATCH (n:X) RETURN n", False)
+    kernel.do_execute("MATCH (n:X) RETURN n", False)
+    assert len(conn.queries) == 1 and len(kernel._result_cache) == 1
+
+    kernel.do_execute("%%profile\nMATCH (n:X) RETURN n", False)
+    assert len(kernel._result_cache) == 1
+    kernel.do_execute("%%profile\nCREATE (n:X)", False)
+    assert len(kernel._result_cache) == 0 and kernel._schema._stale
+    kernel.do_execute("MATCH (n:X) RETURN n", False)
+    assert len(conn.queries) == 4
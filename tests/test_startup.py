@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+
+# Seconds, which importing the kernel module may take at most. Raise it only for a good reason.
+STARTUP_BUDGET = 2.0
+HEAVY_MODULES = ["networkx", "pandas", "pexpect.replwrap", "yaml"]
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=BASE_PATH)
+    return json.loads(proc.stdout)
+
+
+def test_package_import_does_not_load_the_kernel():
+    code = "import sys, json, cypher_kernel; print(json.dumps([m for m in sys.modules if m.split('.')[0] in "
+    code += "('neo4j', 'ipykernel', 'yaml', 'pexpect')]))"
+    assert _run(code) == []
+
+
+def test_helper_streaming_imports_pexpect_on_first_use():
+    code = "import sys, json, cypher_kernel.helper_stream; print(json.dumps('pexpect' in sys.modules))"
+    assert _run(code) is False
+
+
+def test_kernel_import_within_budget():
+    pytest.importorskip("ipykernel")
+    pytest.importorskip("neo4j")
+    code = f"""import sys, json, time
+started = time.perf_counter()
+import cypher_kernel.kernel
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))"""
+    res = _run(code)
+    assert res["heavy"] == []
+    assert res["elapsed"] < STARTUP_BUDGET
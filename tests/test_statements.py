@@ -0,0 +1,26 @@
+from .context import cypher_kernel
+from cypher_kernel.statements import needs_autocommit, split_statements
+
+
+def test_split_statements():
+    code = """CREATE (n:Movie {title: 'Alien; Resurrection'});
+    // Comments may contain ; too
+    MATCH (n) /* ; */ RETURN n.title AS `a;b`;
+    ;
+    RETURN "x;y\\";z"
+    """
+    statements = split_statements(code)
+    assert len(statements) == 3
+    assert statements[0] == "CREATE (n:Movie {title: 'Alien; Resurrection'})"
+    assert statements[1].endswith("RETURN n.title AS `a;b`")
+    assert statements[2] == 'RETURN "x;y\\";z"'
+
+
+def test_split_drops_empty_statements():
+    assert split_statements("MATCH (n) RETURN n;\n// done;\n") == ["MATCH (n) RETURN n"]
+    assert split_statements("// nothing") == []
+
+
+def test_needs_autocommit():
+    assert needs_autocommit("LOAD CSV FROM 'file:///x.csv' AS row CALL { CREATE (:X) } IN TRANSACTIONS OF 100 ROWS")
+    assert not needs_autocommit("RETURN 'IN TRANSACTIONS'")
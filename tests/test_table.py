@@ -0,0 +1,43 @@
+from neo4j.graph import Graph
+from .context import cypher_kernel
+from cypher_kernel.table import ResultTable, format_value
+
+
+def test_format_value():
+    hydrator = Graph.Hydrator(Graph())
+    alice = hydrator.hydrate_node(1, ["Person"], {"name": "Alice"})
+    hydrator.hydrate_node(2, ["Movie"], {})
+    acted = hydrator.hydrate_relationship(3, 1, 2, "ACTED_IN", {"roles": ["Neo"]})
+    assert format_value(alice) == '(:Person {name: "Alice"})'
+    assert format_value(acted) == '[:ACTED_IN {roles: ["Neo"]}]'
+    assert format_value([1, None, True, "a"]) == '[1, null, true, "a"]'
+    unbound = hydrator.hydrate_unbound_relationship(3, "ACTED_IN", {})
+    path = hydrator.hydrate_path([alice, acted.end_node], [unbound], [1, 1])
+    assert format_value(path) == '(:Person {name: "Alice"})-[:ACTED_IN {roles: ["Neo"]}]->(:Movie)'
+    reverse = hydrator.hydrate_path([alice, acted.end_node], [unbound], [-1, 1])
+    assert format_value(reverse) == '(:Person {name: "Alice"})<-[:ACTED_IN {roles: ["Neo"]}]-(:Movie)'
+
+
+
+def test_table_renders_window_with_footer():
+    table = ResultTable(["name", "bio"], max_rows=2, max_width=8)
+    for k in range(1000):
+        table.add([f"p{k}", "a long\ntext"])
+    assert table.rows == 1000
+    assert table.shown_rows == 2
+    assert table.render_text().splitlines() == [
+        "name | bio",
+        "-----+---------",
+        "p0   | a long …",
+        "p1   | a long …",
+        "998 more rows",
+    ]
+    html = table.render_html()
+    assert html.startswith("<table><thead><tr><th>name</th><th>bio</th></tr></thead>")
+    assert html.endswith("</table><p>998 more rows</p>")
+
+
+def test_graph_only_results_have_no_values():
+    table = ResultTable(["n"])
+    table.add([object()], has_values=False)
+    assert not table.has_values
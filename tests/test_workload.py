@@ -0,0 +1,50 @@
+from .context import cypher_kernel
+from .fake_neo4j import FakeConnection, fake_kernel, synthetic_records
+from cypher_kernel.replay import percentile, replay, report
+from cypher_kernel.workload import read_workload
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) is None
+
+
+def test_kernel_captures_cells_that_run_against_the_database(monkeypatch, tmp_path):
+    workload = tmp_path / "workload.jsonl"
+    conn = FakeConnection(lambda query, parameters: synthetic_records(5, shape="scalar"))
+    kernel = fake_kernel(conn, monkeypatch, tmp_path, config=f"workload_file: {workload}\ncache_enabled: True\n")
+    kernel.do_execute("%%params\nlimit: 5", False)
+    kernel.do_execute("MATCH (n)\n// all of them\nRETURN n LIMIT $limit", False)
+    kernel.do_execute("MATCH (n)\n// all of them\nRETURN n LIMIT $limit", False)
+    kernel.do_execute("CREATE (a:A); CREATE (b:B)", False)
+
+    entries = read_workload(workload)
+    assert [entry["query"] for entry in entries] == ["MATCH (n) RETURN n LIMIT $limit", "CREATE (a:A); CREATE (b:B)"]
+    assert entries[0]["parameters"] == {"limit": 5}
+    assert entries[0]["rows"] == 5
+    assert "fetch" in entries[0]["timings"]
+
+    kernel.do_execute("%%parallel\nMATCH (a:A) RETURN a; MATCH (b:B) RETURN b", False)
+    entries = read_workload(workload)[2:]
+    assert [entry["query"] for entry in entries] == ["MATCH (a:A) RETURN a", "MATCH (b:B) RETURN b"]
+    assert [entry["rows"] for entry in entries] == [5, 5]
+    assert all("fetch" in entry["timings"] for entry in entries)
+
+
+def test_replay_reports_latency_diffs():
+    conn = FakeConnection(lambda query, parameters: synthetic_records(10, shape="scalar"))
+    entries = [
+        {"query": f"RETURN {k}", "parameters": {}, "db": None, "rows": 3, "timings": {"fetch": 0.01 * k}}
+        for k in range(1, 21)
+    ]
+    latencies = replay(conn, entries, concurrency=4)
+    assert len(conn.queries) == 20
+    assert all(isinstance(latency, float) for latency in latencies)
+    text = report(entries, latencies)
+    assert "Replayed 20 of 20 queries" in text
+    assert [line.split()[0] for line in text.splitlines()[3:6]] == ["p50", "p95", "p99"]
+    assert "200.0 ms" in text.splitlines()[5]